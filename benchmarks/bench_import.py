@@ -0,0 +1,59 @@
+"""Import time benchmark of the package, based on `python -X importtime`. Every module is imported in a fresh
+interpreter, and the benchmark fails if its cumulative import time is over the budget, or if it pulls in one of the
+heavy dependencies that the package defers until they are needed.
+
+Run from the root of the repository:
+
+    python -m benchmarks.bench_import
+"""
+
+import argparse
+import re
+import subprocess
+import sys
+
+MODULES = ('ds301', 'ds301.inference.hypothesis', 'ds301.inference.confidence', 'ds301.inference.samples',
+           'ds301.inference.permutation', 'ds301.inference.power')
+DEFERRED = ('pandas', 'scipy.stats', 'scipy.special')
+# Budget of cumulative import time in milliseconds, on top of numpy
+BUDGET_MS = 150
+
+_LINE = re.compile(r'import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)')
+
+
+def import_profile(module: str, repeat: int = 5) -> dict:
+    """Best of `repeat` runs of the cumulative import time of `module` (in ms), and the set of modules it imported"""
+    best, imported = None, set()
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                                capture_output=True, text=True, check=True).stderr
+        times = {}
+        for line in output.splitlines():
+            match = _LINE.match(line)
+            if match:
+                times[match.group(4)] = int(match.group(2)) / 1000
+        imported = set(times)
+        cumulative = times.get(module, 0.0) - times.get('numpy', 0.0)
+        best = cumulative if best is None else min(best, cumulative)
+    return {'milliseconds': best, 'imported': imported}
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--budget', type=float, default=BUDGET_MS, help='Budget in ms, excluding numpy')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args(argv)
+
+    failures = 0
+    for module in MODULES:
+        profile = import_profile(module, args.repeat)
+        heavy = sorted(name for name in DEFERRED if name in profile['imported'])
+        failed = profile['milliseconds'] > args.budget or heavy
+        failures += bool(failed)
+        print(f'{"FAIL" if failed else "ok":<6}{module:<32}{profile["milliseconds"]:>9.1f} ms'
+              + (f'  imports {", ".join(heavy)}' if heavy else ''))
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,38 @@
+"""Micro-benchmark of the critical value and p-value kernels against the `scipy.stats` distributions they replace.
+
+Run from the root of the repository:
+
+    python -m benchmarks.bench_kernels
+"""
+
+import timeit
+
+import numpy as np
+from scipy import stats as st
+
+from ds301.inference import kernels
+
+NUMBER = 20000
+
+CASES = {
+    'z* (ci=0.95)': ('st.norm.ppf(0.025)', 'kernels.norm_ppf(0.025)'),
+    't* (ci=0.95, df=29)': ('st.t.ppf(0.025, df=29)', 'kernels.t_ppf(0.025, 29)'),
+    'normal upper tail': ('1 - st.norm.cdf(1.7)', 'kernels.sf(1.7)'),
+    't upper tail (df=29)': ('1 - st.t.cdf(1.7, df=29)', "kernels.sf(1.7, 't', df=29)"),
+    't two-sided, 10^4 values': ('2 * st.t.cdf(-np.abs(x), df=df)', "2 * kernels.sf(np.abs(x), 't', df=df)"),
+}
+
+
+def main():
+    namespace = {'st': st, 'np': np, 'kernels': kernels,
+                 'x': np.linspace(-4, 4, 10 ** 4), 'df': np.arange(1, 10 ** 4 + 1)}
+    print(f'{"case":<28}{"scipy.stats (us)":>18}{"kernels (us)":>15}{"speedup":>10}')
+    for name, (baseline, kernel) in CASES.items():
+        number = NUMBER if 'values' not in name else NUMBER // 100
+        times = [min(timeit.repeat(statement, number=number, repeat=5, globals=namespace)) / number * 1e6
+                 for statement in (baseline, kernel)]
+        print(f'{name:<28}{times[0]:>18.2f}{times[1]:>15.2f}{times[0] / times[1]:>9.1f}x')
+
+
+if __name__ == '__main__':
+    main()
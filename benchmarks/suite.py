@@ -0,0 +1,239 @@
+"""Benchmark suite for the simulation, the hypothesis tests, the intervals and the homework pipelines. Every case is
+timed (best of several repeats, with enough loops per repeat to be measurable) and its peak memory is measured with
+`tracemalloc`. The results are written as JSON, and `compare` flags the cases that got slower or use more memory than
+a stored baseline. The kernels and the import time have their own micro-benchmarks, `bench_kernels` and
+`bench_import`.
+
+Run from the root of the repository:
+
+    python -m benchmarks.suite run --output results.json
+    python -m benchmarks.suite compare baseline.json results.json --threshold 0.2
+"""
+
+import argparse
+import contextlib
+import gc
+import io
+import json
+import platform
+import re
+import runpy
+import sys
+import time
+import tracemalloc
+import warnings
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterator, NamedTuple
+
+import numpy as np
+import pandas as pd
+import scipy
+
+from ds301.inference import confidence, hypothesis, permutation
+from ds301.inference.moments import SummaryStatistics
+from ds301.tools import helpers
+from simulations.genetic_disorder.experiments import GeneticDisorderTestingExperiment
+
+
+class Case(NamedTuple):
+    name: str
+    # Prepares the inputs, outside of the measurement, and returns the function to measure
+    setup: Callable[[], Callable[[], Any]]
+    params: Dict[str, Any]
+
+
+def cases(max_n: int) -> Iterator[Case]:
+    for exponent in range(3, 9):
+        n = 10 ** exponent
+        if n > max_n:
+            break
+        yield Case(f'simulation.run_simulation[n=1e{exponent}]',
+                   lambda n=n: GeneticDisorderTestingExperiment(n=n, rng=np.random.default_rng(0)).run_simulation,
+                   {'n': n})
+        yield Case(f'simulation.run_streaming[n=1e{exponent}]',
+                   lambda n=n: GeneticDisorderTestingExperiment(n=n, rng=np.random.default_rng(0)).run_streaming,
+                   {'n': n})
+        yield Case(f'simulation.run_replicates[binomial,r=1000,n=1e{exponent}]',
+                   lambda n=n: _call(GeneticDisorderTestingExperiment(n=n, engine='binomial',
+                                                                      rng=np.random.default_rng(0)).run_replicates,
+                                     1000),
+                   {'n': n, 'r': 1000})
+
+    for exponent in (2, 4, 6):
+        n = 10 ** exponent
+        if n > max_n:
+            break
+        yield Case(f'hypothesis.single_mean_test[n=1e{exponent}]',
+                   lambda n=n: _call(hypothesis.single_mean_test, _normal_series(n), 0, 'two-sided'), {'n': n})
+        yield Case(f'hypothesis.two_mean_test[n=1e{exponent}]',
+                   lambda n=n: _call(hypothesis.two_mean_test, _two_groups(n).describe(), ('a', 'b'), 'two-sided'),
+                   {'n': n})
+        yield Case(f'hypothesis.single_proportion_test[n=1e{exponent}]',
+                   lambda n=n: _call(hypothesis.single_proportion_test, _counts(n), 'yes', 0.5, 'two-sided'),
+                   {'n': n})
+        yield Case(f'hypothesis.two_proportions_test[n=1e{exponent}]',
+                   lambda n=n: _call(hypothesis.two_proportions_test, _counts(n), ('yes', 'no'), 'two-sided'),
+                   {'n': n})
+        yield Case(f'hypothesis.single_mean_test_batch[rows=1e{exponent},columns=1000]',
+                   lambda n=n: _call(hypothesis.single_mean_test_batch, _normal_matrix(n, 1000), 0, 'two-sided'),
+                   {'n': n, 'columns': 1000})
+        yield Case(f'moments.SummaryStatistics.update[n=1e{exponent}]',
+                   lambda n=n: _call(SummaryStatistics.from_data, _normal_series(n)), {'n': n})
+        yield Case(f'confidence.single_mean_interval[n=1e{exponent}]',
+                   lambda n=n: _call(confidence.single_mean_interval, _normal_series(n), 0.95), {'n': n})
+        yield Case(f'confidence.single_proportion_interval[n=1e{exponent}]',
+                   lambda n=n: _call(confidence.single_proportion_interval, _counts(n), 'yes', 0.95), {'n': n})
+        yield Case(f'confidence.two_proportions_interval[n=1e{exponent}]',
+                   lambda n=n: _call(confidence.two_proportions_interval, _counts(n), ('yes', 'no'), 0.95), {'n': n})
+        if exponent > 4:
+            # The resampling methods are O(B * n); at larger sizes a single run takes minutes
+            continue
+        yield Case(f'confidence.bootstrap_single_mean_interval[B=1000,n=1e{exponent}]',
+                   lambda n=n: _call(confidence.bootstrap_single_mean_interval, _normal_series(n), 0.95,
+                                     n_resamples=1000, seed=0),
+                   {'n': n, 'B': 1000})
+        yield Case(f'permutation.two_means_permutation_test[B=1000,n=1e{exponent}]',
+                   lambda n=n: _call(permutation.two_means_permutation_test, _normal_series(n), _normal_series(n),
+                                     'two-sided', n_permutations=1000, seed=0),
+                   {'n': n, 'B': 1000})
+
+    for module in ('homeworks.hw_9', 'homeworks.hw_10'):
+        yield Case(f'pipeline.{module}', lambda module=module: _call(_run_quietly, module), {})
+
+
+def measure(case: Case, min_time: float = 0.2, repeat: int = 3) -> Dict[str, Any]:
+    function = case.setup()
+    # Number of loops per repeat, so that each repeat takes at least `min_time`
+    loops = 1
+    while True:
+        elapsed = _time(function, loops)
+        if elapsed >= min_time or loops >= 10 ** 6:
+            break
+        loops *= 10 if elapsed < min_time / 10 else 2
+    seconds = min([elapsed] + [_time(function, loops) for _ in range(repeat - 1)]) / loops
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        function()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return {'seconds': seconds, 'peak_bytes': peak, 'loops': loops, 'params': case.params}
+
+
+def run(args) -> int:
+    pattern = re.compile(args.filter) if args.filter else None
+    results = {}
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        for case in cases(args.max_n):
+            if pattern and not pattern.search(case.name):
+                continue
+            results[case.name] = measure(case, args.min_time, args.repeat)
+            print(f'{case.name:<72}{_format_seconds(results[case.name]["seconds"]):>12}'
+                  f'{results[case.name]["peak_bytes"] / 2 ** 20:>10.1f} MB', flush=True)
+    report = {'metadata': _metadata(), 'results': results}
+    with open(args.output, 'w') as output:
+        json.dump(report, output, indent=2)
+    return 0
+
+
+def compare(args) -> int:
+    with open(args.baseline) as baseline_file, open(args.current) as current_file:
+        baseline = json.load(baseline_file)['results']
+        current = json.load(current_file)['results']
+    regressions = 0
+    print(f'{"case":<72}{"time":>9}{"memory":>9}')
+    for name in sorted(set(baseline) & set(current)):
+        time_ratio = current[name]['seconds'] / baseline[name]['seconds']
+        memory_ratio = (current[name]['peak_bytes'] + 1) / (baseline[name]['peak_bytes'] + 1)
+        regressed = time_ratio > 1 + args.threshold or memory_ratio > 1 + args.memory_threshold
+        regressions += regressed
+        print(f'{name:<72}{time_ratio:>8.2f}x{memory_ratio:>8.2f}x{"  REGRESSION" if regressed else ""}')
+    for name in sorted(set(baseline) - set(current)):
+        print(f'{name:<72}  missing from the current results')
+    print(f'{regressions} regression(s)')
+    return 1 if regressions else 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Benchmark suite of the simulation and inference code')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = commands.add_parser('run', help='Run the benchmarks and write the results as JSON')
+    run_parser.add_argument('--output', default='bench_output.json')
+    run_parser.add_argument('--filter', help='Only run the cases whose name matches this regular expression')
+    run_parser.add_argument('--max-n', type=float, default=1e7, help='Largest sample size to benchmark (up to 1e8)')
+    run_parser.add_argument('--min-time', type=float, default=0.2, help='Minimum seconds per repeat')
+    run_parser.add_argument('--repeat', type=int, default=3)
+    run_parser.set_defaults(handler=run)
+
+    compare_parser = commands.add_parser('compare', help='Flag regressions against a baseline')
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('current')
+    compare_parser.add_argument('--threshold', type=float, default=0.2,
+                                help='Relative slowdown considered a regression, i.e. 0.2 for 20%%')
+    compare_parser.add_argument('--memory-threshold', type=float, default=0.2,
+                                help='Relative increase of peak memory considered a regression')
+    compare_parser.set_defaults(handler=compare)
+
+    args = parser.parse_args(argv)
+    return args.handler(args)
+
+
+def _call(function: Callable, *args, **kwargs) -> Callable[[], Any]:
+    return lambda: function(*args, **kwargs)
+
+
+def _time(function: Callable[[], Any], loops: int) -> float:
+    start = time.perf_counter()
+    for _ in range(loops):
+        function()
+    return time.perf_counter() - start
+
+
+def _normal_series(n: int) -> pd.Series:
+    return pd.Series(np.random.default_rng(n).normal(size=n))
+
+
+def _normal_matrix(rows: int, columns: int) -> np.ndarray:
+    return np.random.default_rng(rows).normal(size=(min(rows, 10 ** 4), columns))
+
+
+def _two_groups(n: int) -> pd.DataFrame:
+    rng = np.random.default_rng(n)
+    return pd.DataFrame({'a': rng.normal(size=n), 'b': rng.normal(0.1, size=n)})
+
+
+def _counts(n: int) -> pd.Series:
+    return pd.Series({'yes': int(0.4 * n), 'no': int(0.35 * n), 'maybe': n - int(0.4 * n) - int(0.35 * n)})
+
+
+def _run_quietly(module: str):
+    # Every loop must pay for the condition warnings, not only the loops before the rate limit kicks in
+    helpers.reset_warning_limits()
+    with contextlib.redirect_stdout(io.StringIO()):
+        runpy.run_module(module, run_name='__main__')
+
+
+def _format_seconds(seconds: float) -> str:
+    for unit, scale in (('s', 1), ('ms', 1e-3), ('us', 1e-6)):
+        if seconds >= scale:
+            return f'{seconds / scale:.2f} {unit}'
+    return f'{seconds / 1e-9:.0f} ns'
+
+
+def _metadata() -> Dict[str, Any]:
+    return {
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'scipy': scipy.__version__,
+    }
+
+
+if __name__ == '__main__':
+    sys.exit(main())
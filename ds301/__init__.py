@@ -0,0 +1,54 @@
+"""Probability and simulation based inference for data science.
+
+The package is a lazy facade: importing it is cheap, and the functions below are loaded from their modules (with
+their numpy, pandas and SciPy dependencies) the first time they are used, i.e. `ds301.single_mean_test(...)`.
+Submodules can also be imported directly, i.e. `from ds301.inference import hypothesis`.
+"""
+
+import importlib
+
+_SUBMODULES = ('datasets', 'inference', 'tools')
+
+_ATTRIBUTES = {
+    'ds301.datasets': ('load_dataset', 'list_datasets'),
+    'ds301.inference.hypothesis': (
+        'get_p_value', 'single_mean_test', 'single_proportion_test', 'two_mean_test', 'two_proportions_test',
+        'single_mean_test_batch', 'single_proportion_test_batch', 'two_mean_test_batch', 'two_proportions_test_batch',
+        'adjust_p_values',
+    ),
+    'ds301.inference.grouped': ('pairwise_proportions_test', 'pairwise_means_test'),
+    'ds301.inference.confidence': (
+        'single_mean_interval', 'single_proportion_interval', 'two_means_interval', 'two_proportions_interval',
+        'bootstrap_single_mean_interval', 'bootstrap_single_proportion_interval', 'bootstrap_two_means_interval',
+        'bootstrap_two_proportions_interval',
+    ),
+    'ds301.inference.permutation': (
+        'two_means_permutation_test', 'matched_pairs_permutation_test', 'single_proportion_randomization_test',
+        'two_proportions_permutation_test',
+    ),
+    'ds301.inference.samples': ('single_proportion_sample_size', 'single_mean_sample_size'),
+    'ds301.inference.power': (
+        'single_mean_power', 'single_proportion_power', 'two_means_power', 'two_proportions_power', 'power_grid',
+        'minimum_sample_size', 'simulated_power',
+    ),
+    'ds301.inference.moments': ('SummaryStatistics',),
+}
+_MODULE_OF = {attribute: module for module, attributes in _ATTRIBUTES.items() for attribute in attributes}
+
+__all__ = list(_SUBMODULES) + list(_MODULE_OF)
+
+
+def __getattr__(name: str):
+    if name in _MODULE_OF:
+        value = getattr(importlib.import_module(_MODULE_OF[name]), name)
+    elif name in _SUBMODULES:
+        value = importlib.import_module(f'{__name__}.{name}')
+    else:
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+    # Cache it in the module namespace, so __getattr__ isn't called again for this name
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,5 @@
+import sys
+
+from ds301.cli import main
+
+sys.exit(main())
@@ -0,0 +1,271 @@
+"""Command line entry point to run batches of tests and intervals declared in a file, one job per line (JSONL), or as a
+list in a YAML file when PyYAML is installed. Every job names a dataset, the test or interval (its `kind`), the columns
+it uses and the parameters of the function::
+
+    {"id": "q1", "dataset": "SalaryGender", "kind": "single_mean_test", "column": "Age",
+     "params": {"mu_0": 50, "alternative": "less"}}
+    {"id": "q5", "dataset": "CocaineTreatment", "kind": "two_proportions_test", "column": "Drug",
+     "where": {"Relapse": "no"}, "params": {"categories": ["Lithium", "Placebo"], "alternative": "greater"}}
+    {"id": "q15", "dataset": "ImmuneTea", "kind": "two_mean_test", "column": "InterferonGamma", "group": "Drink",
+     "params": {"categories": ["Tea", "Coffee"], "alternative": "greater"}}
+
+The jobs are grouped by dataset and run in chunks on a pool of processes, so each worker loads a dataset (from the
+columnar cache of `ds301.datasets`) once per chunk. The results are written as JSONL as soon as each chunk finishes, in
+completion order. With `--resume`, the jobs that already have a result in the output file are skipped, so an
+interrupted batch can be restarted.
+
+Run with:
+
+    python -m ds301 run jobs.jsonl --output results.jsonl --workers 8
+"""
+
+import argparse
+import importlib
+import json
+import os
+import sys
+import warnings
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Dict, Iterator, List, Tuple
+
+import numpy as np
+
+from ds301.tools.helpers import reset_warning_limits
+
+# The function of each kind of job, and how its first argument is built from the data:
+#   'values': the column, as a Series
+#   'counts': the count of each category of the column, as in `single_proportion_test`
+#   'groups': the summary statistics of the column in each group of `group`, or of each one of `columns`
+#   'table': the DataFrame itself, with `group` and `column` passed by name
+JOB_KINDS = {
+    'single_mean_test': ('ds301.inference.hypothesis', 'values'),
+    'single_proportion_test': ('ds301.inference.hypothesis', 'counts'),
+    'two_mean_test': ('ds301.inference.hypothesis', 'groups'),
+    'two_proportions_test': ('ds301.inference.hypothesis', 'counts'),
+    'single_mean_interval': ('ds301.inference.confidence', 'values'),
+    'single_proportion_interval': ('ds301.inference.confidence', 'counts'),
+    'two_means_interval': ('ds301.inference.confidence', 'groups'),
+    'two_proportions_interval': ('ds301.inference.confidence', 'counts'),
+    'bootstrap_single_mean_interval': ('ds301.inference.confidence', 'values'),
+    'bootstrap_single_proportion_interval': ('ds301.inference.confidence', 'counts'),
+    'bootstrap_two_proportions_interval': ('ds301.inference.confidence', 'counts'),
+    'pairwise_proportions_test': ('ds301.inference.grouped', 'table'),
+    'pairwise_means_test': ('ds301.inference.grouped', 'table'),
+}
+# Name of the column parameter of the functions that receive the whole table
+_TABLE_COLUMN = {'pairwise_proportions_test': 'outcome', 'pairwise_means_test': 'value'}
+# Parameters that the functions expect as tuples, but JSON can only express as lists
+_TUPLE_PARAMETERS = ('categories',)
+
+
+def run(args) -> int:
+    jobs = read_jobs(args.jobs)
+    done = _finished_ids(args.output) if args.resume and args.output != '-' else set()
+    pending = [job for job in jobs if job['id'] not in done]
+    output = sys.stdout if args.output == '-' else open(args.output, 'a' if args.resume else 'w')
+    if output is not sys.stdout and output.tell() > 0:
+        # Terminate a truncated last line of an interrupted run before appending
+        with open(args.output, 'rb') as previous:
+            previous.seek(-1, os.SEEK_END)
+            if previous.read(1) != b'\n':
+                output.write('\n')
+    failed = 0
+    try:
+        for record in _run_jobs(pending, args.workers, args.chunk_size):
+            failed += 'error' in record
+            output.write(json.dumps(record) + '\n')
+            output.flush()
+    finally:
+        if output is not sys.stdout:
+            output.close()
+    print(f'{len(pending) - failed} job(s) succeeded, {failed} failed, {len(jobs) - len(pending)} skipped',
+          file=sys.stderr)
+    return 1 if failed else 0
+
+
+def read_jobs(path: str) -> List[Dict[str, Any]]:
+    """Reads the job specs of a JSONL file, or of a YAML file with a list of jobs. Jobs without an `id` get their
+    position in the file as id.
+    """
+    with open(path) as jobs_file:
+        if path.endswith(('.yaml', '.yml')):
+            try:
+                import yaml
+            except ImportError:
+                raise ValueError("PyYAML is required to read YAML job files, use JSONL instead") from None
+            jobs = yaml.safe_load(jobs_file) or []
+        else:
+            jobs = [json.loads(line) for line in jobs_file if line.strip()]
+    for position, job in enumerate(jobs):
+        job.setdefault('id', str(position))
+    ids = [job['id'] for job in jobs]
+    if len(set(ids)) != len(ids):
+        raise ValueError("The ids of the jobs must be unique")
+    return jobs
+
+
+def run_job(job: Dict[str, Any], data) -> Dict[str, Any]:
+    """Runs a single job on the rows of its dataset
+
+    Returns:
+        The record written to the output: the id and kind of the job, and either its JSON-compatible "result" and the
+        messages of the "warnings" it raised, or an "error"
+    """
+    record = {'id': job['id'], 'kind': job.get('kind'), 'dataset': job.get('dataset')}
+    try:
+        if job.get('kind') not in JOB_KINDS:
+            raise ValueError(f"Unknown kind {job.get('kind')!r}. Valid kinds are {sorted(JOB_KINDS)}")
+        module, source = JOB_KINDS[job['kind']]
+        function = getattr(importlib.import_module(module), job['kind'])
+        params = {name: tuple(value) if name in _TUPLE_PARAMETERS else value
+                  for name, value in job.get('params', {}).items()}
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter('always')
+            # The rate limit of the condition warnings is per process, but the warnings are reported per job
+            reset_warning_limits()
+            if source == 'table':
+                result = function(_filter(data, job.get('where')), group=job['group'],
+                                  **{_TABLE_COLUMN[job['kind']]: job['column']}, **params)
+            else:
+                result = function(_first_argument(_filter(data, job.get('where')), job, source), **params)
+        record['result'] = _to_json(result)
+        record['warnings'] = [str(warning.message) for warning in caught]
+    except Exception as error:
+        record['error'] = f'{type(error).__name__}: {error}'
+    return record
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m ds301', description='Batch runner of ds301 tests and intervals')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = commands.add_parser('run', help='Run the jobs of a JSONL (or YAML) file, writing the results as JSONL')
+    run_parser.add_argument('jobs')
+    run_parser.add_argument('--output', default='-', help="Output JSONL file, '-' (default) for stdout")
+    run_parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Number of processes')
+    run_parser.add_argument('--chunk-size', type=int, default=100, help='Maximum number of jobs per task')
+    run_parser.add_argument('--resume', action='store_true',
+                            help='Skip the jobs with a result in the output file, and append the new results to it')
+    run_parser.set_defaults(handler=run)
+
+    args = parser.parse_args(argv)
+    return args.handler(args)
+
+
+def _run_jobs(jobs: List[Dict[str, Any]], workers: int, chunk_size: int) -> Iterator[Dict[str, Any]]:
+    chunks = list(_chunks(jobs, chunk_size))
+    if workers <= 1 or len(chunks) <= 1:
+        for chunk in chunks:
+            yield from _run_chunk(chunk)
+        return
+    # Build the cache of every dataset up front, so the workers don't all parse the same CSV file
+    from ds301.datasets import load_dataset
+    for dataset in {dataset for dataset, _ in chunks}:
+        try:
+            load_dataset(dataset, columns=[])
+        except Exception:
+            # Reported as an error of each job by the workers
+            pass
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(_run_chunk, chunk) for chunk in chunks]
+        for future in as_completed(futures):
+            yield from future.result()
+
+
+def _chunks(jobs: List[Dict[str, Any]], chunk_size: int) -> Iterator[Tuple[str, List[Dict[str, Any]]]]:
+    """Jobs grouped by dataset, in chunks of up to `chunk_size` jobs"""
+    by_dataset: Dict[str, List[Dict[str, Any]]] = {}
+    for job in jobs:
+        by_dataset.setdefault(job.get('dataset'), []).append(job)
+    for dataset, dataset_jobs in by_dataset.items():
+        for start in range(0, len(dataset_jobs), chunk_size):
+            yield dataset, dataset_jobs[start:start + chunk_size]
+
+
+def _run_chunk(chunk: Tuple[str, List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    from ds301.datasets import dataset_columns, load_dataset
+    dataset, jobs = chunk
+    try:
+        available = set(dataset_columns(dataset))
+        # Only the columns used by the jobs are loaded
+        data = load_dataset(dataset, columns=sorted({column for job in jobs for column in _columns(job)} & available))
+    except Exception as error:
+        return [_error_record(job, error) for job in jobs]
+    records = []
+    for job in jobs:
+        # A job with a wrong column fails on its own, the other jobs of the chunk still run
+        missing = [column for column in _columns(job) if column not in available]
+        if missing:
+            records.append(_error_record(job, ValueError(f"Columns {missing} are not in the dataset {dataset!r}")))
+        else:
+            records.append(run_job(job, data))
+    return records
+
+
+def _error_record(job: Dict[str, Any], error: Exception) -> Dict[str, Any]:
+    return {'id': job['id'], 'kind': job.get('kind'), 'dataset': job.get('dataset'),
+            'error': f'{type(error).__name__}: {error}'}
+
+
+def _columns(job: Dict[str, Any]) -> List[str]:
+    columns = list(job.get('columns', []))
+    columns += [job[key] for key in ('column', 'group') if key in job]
+    return columns + list(job.get('where', {}))
+
+
+def _filter(data, where: Dict[str, Any]):
+    """Rows of `data` where every column of `where` is equal to its value, or in it if the value is a list"""
+    if not where:
+        return data
+    mask = np.ones(len(data), dtype=bool)
+    for column, value in where.items():
+        mask &= data[column].isin(value).to_numpy() if isinstance(value, list) else (data[column] == value).to_numpy()
+    return data[mask]
+
+
+def _first_argument(data, job: Dict[str, Any], source: str):
+    if source == 'values':
+        return data[job['column']]
+    if source == 'counts':
+        return data[job['column']].value_counts()
+    from ds301.inference.moments import SummaryStatistics
+    import pandas as pd
+    if 'group' in job:
+        codes, groups = pd.factorize(data[job['group']], sort=True)
+        return SummaryStatistics.from_groups(data[job['column']], codes, columns=list(groups))
+    return SummaryStatistics.from_data(data[job['columns']])
+
+
+def _to_json(value):
+    """Converts the result of a job to JSON-compatible values. NaN becomes null"""
+    if isinstance(value, dict):
+        return {str(key): _to_json(item) for key, item in value.items()}
+    if hasattr(value, 'to_dict') and hasattr(value, 'columns'):
+        return _to_json(value.to_dict(orient='records'))
+    if hasattr(value, 'met') and hasattr(value, 'all_met'):
+        return {'all-met': value.all_met, 'failed': value.n_failed}
+    if isinstance(value, (list, tuple, np.ndarray)):
+        return [_to_json(item) for item in value]
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and np.isnan(value):
+        return None
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    return str(value)
+
+
+def _finished_ids(path: str) -> set:
+    """Ids of the jobs with a result in an output file. A truncated last line, from an interrupted run, is ignored"""
+    if not os.path.exists(path):
+        return set()
+    finished = set()
+    with open(path) as output:
+        for line in output:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if 'result' in record:
+                finished.add(record['id'])
+    return finished
@@ -0,0 +1,176 @@
+"""Loader of the CSV datasets of the course, backed by a columnar binary cache.
+
+The first time a dataset is loaded, its CSV file is parsed once and every column is written to its own `.npy` file;
+text columns are stored as integer category codes, with the categories in the manifest of the cache. Later loads
+memory-map the `.npy` files instead of parsing the CSV again, so they only read the columns that are requested, and
+every process that loads the same dataset shares the same pages of the OS cache.
+
+The cache of a dataset is rebuilt when its CSV file changes. The size and modification time of the file are checked on
+every load, and its SHA-256 digest when they differ, so touching a file doesn't invalidate its cache.
+
+The cache is kept in `ds301/data/.cache`, or in the directory of the environment variable `DS301_CACHE_DIR`.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Sequence
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+CACHE_DIR_VARIABLE = 'DS301_CACHE_DIR'
+MANIFEST_FILE = 'manifest.json'
+
+
+def list_datasets() -> List[str]:
+    """Names of the datasets shipped with the package"""
+    return sorted(name[:-len('.csv')] for name in os.listdir(DATA_DIR) if name.endswith('.csv'))
+
+
+def load_dataset(name: str, columns: Sequence[str] = None, cache: bool = True) -> pd.DataFrame:
+    """Loads a dataset from the columnar cache, building the cache first if it's missing or out of date
+
+    Args:
+        name: Name of a dataset shipped with the package, i.e. 'SalaryGender', or the path of any CSV file
+        columns: Optional subset of columns to load. By default, all the columns in the order of the CSV file
+        cache: When False, the CSV file is parsed with `pandas.read_csv` and the cache is neither read nor written
+
+    Returns:
+        DataFrame with the requested columns. Numeric and boolean columns are copy-on-write views of memory-mapped
+        files: they can be modified in place, and the changes stay in this process, without touching the cache. Text
+        columns are categorical, with missing values as NaN.
+
+    Example:
+        >>> salary_data = load_dataset('SalaryGender')
+        >>> ages = load_dataset('SalaryGender', columns=['Age'])['Age']
+    """
+    source = _source_path(name)
+    if not cache:
+        return pd.read_csv(source, usecols=columns)[list(columns)] if columns is not None else pd.read_csv(source)
+    directory, manifest = _cached(source)
+    names = [column['name'] for column in manifest['columns']]
+    if columns is not None:
+        unknown = [column for column in columns if column not in names]
+        if unknown:
+            raise ValueError(f"Columns {unknown} are not in the dataset {name!r}")
+    else:
+        columns = names
+    specs = {column['name']: column for column in manifest['columns']}
+    data = {column: _load_column(directory, specs[column]) for column in columns}
+    return pd.DataFrame(data, columns=list(columns), copy=False)
+
+
+def dataset_columns(name: str) -> List[str]:
+    """Names of the columns of a dataset, read from the manifest of its cache (which is built if needed)"""
+    _, manifest = _cached(_source_path(name))
+    return [column['name'] for column in manifest['columns']]
+
+
+def cache_dir() -> str:
+    """Directory of the cache, from `DS301_CACHE_DIR` or `ds301/data/.cache` by default"""
+    return os.environ.get(CACHE_DIR_VARIABLE) or os.path.join(DATA_DIR, '.cache')
+
+
+def _source_path(name: str) -> str:
+    if os.path.exists(name):
+        return os.path.abspath(name)
+    path = os.path.join(DATA_DIR, f'{name}.csv')
+    if not os.path.exists(path):
+        raise ValueError(f"Unknown dataset {name!r}. Available datasets are {list_datasets()}")
+    return path
+
+
+def _cached(source: str):
+    """Directory and manifest of the up-to-date cache of `source`, building it if needed.
+
+    Every version of the cache lives in its own directory, named after the digest of the CSV file, which is never
+    modified once it's in place. The manifest at the root of the dataset points to the current version and is replaced
+    atomically, so concurrent readers always see a complete cache, even while another process rebuilds it.
+    """
+    root = os.path.join(cache_dir(), _cache_key(source))
+    stat = os.stat(source)
+    manifest = _read_manifest(root)
+    if manifest is not None and (manifest['size'], manifest['mtime-ns']) == (stat.st_size, stat.st_mtime_ns):
+        return os.path.join(root, manifest['sha256']), manifest
+
+    digest = _sha256(source)
+    if manifest is None or manifest['sha256'] != digest or not os.path.isdir(os.path.join(root, digest)):
+        manifest = _build(source, root, digest)
+    manifest.update({'size': stat.st_size, 'mtime-ns': stat.st_mtime_ns})
+    _write_manifest(root, manifest)
+    _remove_old_versions(root, digest)
+    return os.path.join(root, digest), manifest
+
+
+def _build(source: str, root: str, digest: str) -> Dict:
+    os.makedirs(root, exist_ok=True)
+    data = pd.read_csv(source)
+    # Written to a temporary directory first, and renamed when complete
+    temporary = tempfile.mkdtemp(prefix='.build-', dir=root)
+    specs = []
+    try:
+        for position, (name, column) in enumerate(data.items()):
+            spec = {'name': name, 'file': f'{position}.npy'}
+            if pd.api.types.is_numeric_dtype(column.dtype) or pd.api.types.is_bool_dtype(column.dtype):
+                values = column.to_numpy()
+            else:
+                codes, categories = pd.factorize(column, sort=True)
+                values = codes.astype(np.int32)
+                spec['categories'] = [str(category) for category in categories]
+            np.save(os.path.join(temporary, spec['file']), values, allow_pickle=False)
+            specs.append(spec)
+        try:
+            os.rename(temporary, os.path.join(root, digest))
+        except OSError:
+            # Another process built the same version in the meantime
+            shutil.rmtree(temporary, ignore_errors=True)
+    except BaseException:
+        shutil.rmtree(temporary, ignore_errors=True)
+        raise
+    return {'source': source, 'sha256': digest, 'rows': len(data), 'columns': specs}
+
+
+def _load_column(directory: str, spec: Dict):
+    values = np.load(os.path.join(directory, spec['file']), mmap_mode='c', allow_pickle=False)
+    if 'categories' in spec:
+        return pd.Categorical.from_codes(values, categories=spec['categories'])
+    return values
+
+
+def _read_manifest(root: str):
+    try:
+        with open(os.path.join(root, MANIFEST_FILE)) as manifest_file:
+            return json.load(manifest_file)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_manifest(root: str, manifest: Dict):
+    handle, temporary = tempfile.mkstemp(prefix='.manifest-', dir=root)
+    with os.fdopen(handle, 'w') as manifest_file:
+        json.dump(manifest, manifest_file)
+    os.replace(temporary, os.path.join(root, MANIFEST_FILE))
+
+
+def _remove_old_versions(root: str, digest: str):
+    for entry in os.listdir(root):
+        if entry not in (digest, MANIFEST_FILE) and not entry.startswith('.'):
+            # Best effort: a reader on another platform may still hold the files of an old version open
+            shutil.rmtree(os.path.join(root, entry), ignore_errors=True)
+
+
+def _cache_key(source: str) -> str:
+    """Name of the cache of a CSV file: the name of the file, plus a hash of its path to tell apart equal names"""
+    stem = os.path.splitext(os.path.basename(source))[0]
+    return f'{stem}-{hashlib.sha256(source.encode()).hexdigest()[:12]}'
+
+
+def _sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as source:
+        for block in iter(lambda: source.read(2 ** 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
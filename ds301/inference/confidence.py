@@ -0,0 +1,252 @@
+from __future__ import annotations
+import functools
+import numpy as np
+from typing import TYPE_CHECKING, Callable, Dict, Tuple, Union
+from ds301.inference import kernels
+from ds301.inference.hypothesis import _two_means_se
+from ds301.inference.moments import SummaryStatistics, summarize
+from ds301.inference.resampling import iter_batches, observed_values, resample_means
+from ds301.tools.helpers import validate_conditions_for_theoretical_distns
+from ds301.tools.instrumentation import instrument
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+@instrument
+def single_mean_interval(sample: Union[pd.Series, SummaryStatistics], ci: float) -> Tuple[float, float]:
+    """
+
+    Args:
+        sample: Numeric variable with the values in a Pandas Series, or its `SummaryStatistics`
+        ci: Level of confidence for the interval as a real number between 0 and 1. i.e. 0.90 for a 90% interval
+
+    Returns:
+        Tuple with the start and end values of the interval.
+    """
+    _statistics = summarize(sample)
+    _SE = _statistics['std'] / np.sqrt(_statistics['count'])
+    df = _statistics['count'] - 1
+    t_star = abs(kernels.t_ppf((1-ci)/2, df))
+    _ME = t_star * _SE
+    validate_conditions_for_theoretical_distns(inference_type='single-mean', n=_statistics['count'])
+    return _statistics['mean'] - _ME, _statistics['mean'] + _ME
+
+
+@instrument
+def single_proportion_interval(sample: pd.Series, category: str, ci: float) -> Tuple[float, float]:
+    """
+    Args:
+        sample: Series with the count of two categorical variables. Check the example below for details.
+        category: The name of the category we want to estimate the proportion for.
+        ci: Level of confidence for the interval as a real number between 0 and 1. i.e. 0.90 for a 90% interval
+
+    Returns:
+        Tuple with the start and end values of the interval.
+
+    Example:
+        The following is an example of the format required for the `sample` parameter. The index values (yes, no) are
+        the categories, and the values are the count of elements in each category::
+
+            >>> sample
+            Out[1]:
+            Relapse
+            no      4
+            yes    20
+            Name: Drug, dtype: int64
+    """
+    n = sample.sum()
+    p_hat = sample[category] / n
+    _SE = np.sqrt(p_hat * (1 - p_hat) / n)
+    z_star = abs(kernels.norm_ppf((1-ci)/2))
+    _ME = z_star * _SE
+    validate_conditions_for_theoretical_distns(inference_type='single-proportion', n=n, p=p_hat)
+    return p_hat - _ME, p_hat + _ME
+
+
+@instrument
+def two_means_interval(data_stats: Union[pd.DataFrame, Dict[str, SummaryStatistics], SummaryStatistics],
+                       categories: Tuple[str, str], ci: float, **args) -> Tuple[float, float]:
+    """
+    Args:
+        data_stats: Summary Statistics of two numerical variables, in the same formats accepted by
+            `hypothesis.two_mean_test`, i.e. a `describe()` frame with one column per category
+        categories: A Tuple with the name of the categories. The order is important, the first element of the Tuple
+                    will be `X1` and the second element `X2`. The confidence interval is on `mu1 - mu2`
+        ci: Level of confidence for the interval as a real number between 0 and 1. i.e. 0.90 for a 90% interval
+        **args: Same optional parameters as `hypothesis.two_mean_test`, i.e. `df='satterthwait'` to use the
+            Satterthwait approximation for the degrees of freedom instead of the minimum of `n1-1` or `n2-1`
+
+    Returns:
+        Tuple with the start and end values of the interval.
+    """
+    set_a = data_stats.get(categories[0])
+    set_b = data_stats.get(categories[1])
+    n1 = set_a['count']
+    n2 = set_b['count']
+    _SE, df = _two_means_se(n1, set_a['std'], n2, set_b['std'], satterthwait=args.get('df') == 'satterthwait')
+    t_star = abs(kernels.t_ppf((1-ci)/2, df))
+    _ME = t_star * _SE
+    validate_conditions_for_theoretical_distns(inference_type='two-means', n1=n1, n2=n2)
+    difference = set_a['mean'] - set_b['mean']
+    return difference - _ME, difference + _ME
+
+
+@instrument
+def two_proportions_interval(sample: pd.Series, categories: Tuple[str, str], ci: float):
+    """
+    Args:
+        sample: Series with the count of two categorical variables. Check the example below for details.
+        categories: A Tuple with the name of the categories required to use the test. The order is important, the first
+                    element of the Tuple will be used for `p1` and the second element for `p2`. The confidence interval
+                    is one `p1 - p2`
+        ci: Level of confidence for the interval as a real number between 0 and 1. i.e. 0.90 for a 90% interval
+
+    Returns:
+        Tuple with the start and end values of the interval.
+
+    Example:
+        The following is an example of the format for the `sample` parameter. Similarly to `single_proportion_interval`,
+        the index values (Desipramine, Lithium, Placebo) are the categories, and the values are the count of elements in
+        each category. The `two_proportions_interval`, requires at least three categories::
+
+            >>> sample
+            Out[1]:
+            Drug
+            Desipramine    14
+            Lithium         6
+            Placebo         4
+            Name: Relapse, dtype: int64
+
+    """
+    n = sample.sum()
+    n1 = sample[categories[0]]
+    n2 = sample[categories[1]]
+    p1_hat = n1 / n
+    p2_hat = n2 / n
+    _SE = np.sqrt((p1_hat*(1-p1_hat))/n1 + (p2_hat*(1-p2_hat))/n2)
+    z_star = abs(kernels.norm_ppf((1-ci)/2))
+    _ME = z_star * _SE
+    validate_conditions_for_theoretical_distns(inference_type='two-proportions', x1=(n1, p1_hat), x2=(n2, p2_hat))
+    return (p1_hat-p2_hat) - _ME, (p1_hat-p2_hat) + _ME
+
+
+@instrument
+def bootstrap_single_mean_interval(sample: pd.Series, ci: float, n_resamples: int = 10000, method: str = 'percentile',
+                                   **kwargs) -> Tuple[float, float]:
+    """Bootstrap interval for a mean
+
+    Args:
+        sample: Numeric variable with the values in a Pandas Series. Missing values are ignored.
+        ci: Level of confidence for the interval as a real number between 0 and 1. i.e. 0.90 for a 90% interval
+        n_resamples: Number of bootstrap resamples
+        method: 'percentile' (default) uses the quantiles of the bootstrap distribution. 'se' uses the statistic plus or
+            minus z* times the standard error of the bootstrap distribution.
+        **kwargs: Optional parameters for the resampling engine: `seed`, `workers` (number of processes, None for all
+            the CPUs) and `batch_size` (number of resamples drawn with each random generator). Check
+            `ds301.inference.resampling.iter_batches` for details.
+
+    Returns:
+        Tuple with the start and end values of the interval.
+    """
+    values = observed_values(sample)
+    draw = functools.partial(resample_means, values)
+    return _bootstrap_interval(values.mean(), draw, ci, n_resamples, method, **kwargs)
+
+
+@instrument
+def bootstrap_single_proportion_interval(sample: pd.Series, category: str, ci: float, n_resamples: int = 10000,
+                                         method: str = 'percentile', **kwargs) -> Tuple[float, float]:
+    """Bootstrap interval for a proportion. Resampling the subjects of a single categorical variable is the same as
+    drawing the count of the category from Binomial(n, p_hat), so each resample costs O(1).
+
+    Args:
+        sample: Series with the count of two categorical variables, as in `single_proportion_interval`.
+        category: The name of the category we want to estimate the proportion for.
+        ci: Level of confidence for the interval as a real number between 0 and 1. i.e. 0.90 for a 90% interval
+        n_resamples: Number of bootstrap resamples
+        method: 'percentile' (default) or 'se'. Check `bootstrap_single_mean_interval`.
+        **kwargs: Optional parameters for the resampling engine. Check `bootstrap_single_mean_interval`.
+
+    Returns:
+        Tuple with the start and end values of the interval.
+    """
+    n = int(sample.sum())
+    p_hat = sample[category] / n
+    draw = functools.partial(_resample_proportions, n, p_hat)
+    return _bootstrap_interval(p_hat, draw, ci, n_resamples, method, **kwargs)
+
+
+@instrument
+def bootstrap_two_means_interval(sample_1: pd.Series, sample_2: pd.Series, ci: float, n_resamples: int = 10000,
+                                 method: str = 'percentile', **kwargs) -> Tuple[float, float]:
+    """Bootstrap interval for the difference of two means, `mu1 - mu2`. Each group is resampled independently.
+
+    Args:
+        sample_1: Numeric variable with the values of the first group in a Pandas Series. Missing values are ignored.
+        sample_2: Numeric variable with the values of the second group in a Pandas Series.
+        ci: Level of confidence for the interval as a real number between 0 and 1. i.e. 0.90 for a 90% interval
+        n_resamples: Number of bootstrap resamples
+        method: 'percentile' (default) or 'se'. Check `bootstrap_single_mean_interval`.
+        **kwargs: Optional parameters for the resampling engine. Check `bootstrap_single_mean_interval`.
+
+    Returns:
+        Tuple with the start and end values of the interval.
+    """
+    values_1 = observed_values(sample_1)
+    values_2 = observed_values(sample_2)
+    draw = functools.partial(_resample_mean_differences, values_1, values_2)
+    return _bootstrap_interval(values_1.mean() - values_2.mean(), draw, ci, n_resamples, method, **kwargs)
+
+
+@instrument
+def bootstrap_two_proportions_interval(sample: pd.Series, categories: Tuple[str, str], ci: float,
+                                       n_resamples: int = 10000, method: str = 'percentile',
+                                       **kwargs) -> Tuple[float, float]:
+    """Bootstrap interval for `p1 - p2`, with the proportions defined as in `two_proportions_interval`. The counts of
+    all the categories are resampled at once from Multinomial(n, sample / n), so each resample costs O(categories).
+
+    Args:
+        sample: Series with the count of the categorical variables. Check `two_proportions_interval` for details.
+        categories: A Tuple with the name of the categories. The first element is used for `p1` and the second for `p2`
+        ci: Level of confidence for the interval as a real number between 0 and 1. i.e. 0.90 for a 90% interval
+        n_resamples: Number of bootstrap resamples
+        method: 'percentile' (default) or 'se'. Check `bootstrap_single_mean_interval`.
+        **kwargs: Optional parameters for the resampling engine. Check `bootstrap_single_mean_interval`.
+
+    Returns:
+        Tuple with the start and end values of the interval.
+    """
+    counts = sample.to_numpy(dtype=np.int64)
+    n = int(counts.sum())
+    positions = (sample.index.get_loc(categories[0]), sample.index.get_loc(categories[1]))
+    draw = functools.partial(_resample_proportion_differences, n, counts / n, positions)
+    return _bootstrap_interval((counts[positions[0]] - counts[positions[1]]) / n, draw, ci, n_resamples, method,
+                               **kwargs)
+
+
+def _bootstrap_interval(statistic: float, draw: Callable[[np.random.Generator, int], np.ndarray], ci: float,
+                        n_resamples: int, method: str, **kwargs) -> Tuple[float, float]:
+    bootstrap = np.concatenate(list(iter_batches(draw, n_resamples, **kwargs)))
+    if method == 'percentile':
+        start, end = np.quantile(bootstrap, [(1 - ci) / 2, 1 - (1 - ci) / 2])
+    elif method == 'se':
+        _ME = abs(kernels.norm_ppf((1 - ci) / 2)) * bootstrap.std(ddof=1)
+        start, end = statistic - _ME, statistic + _ME
+    else:
+        raise ValueError("method must be 'percentile' or 'se'")
+    return start, end
+
+
+def _resample_proportions(n: int, p_hat: float, rng: np.random.Generator, size: int) -> np.ndarray:
+    return rng.binomial(n, p_hat, size=size) / n
+
+
+def _resample_mean_differences(values_1: np.ndarray, values_2: np.ndarray, rng: np.random.Generator,
+                               size: int) -> np.ndarray:
+    return resample_means(values_1, rng, size) - resample_means(values_2, rng, size)
+
+
+def _resample_proportion_differences(n: int, p_hats: np.ndarray, positions: Tuple[int, int],
+                                     rng: np.random.Generator, size: int) -> np.ndarray:
+    counts = rng.multinomial(n, p_hats, size=size)
+    return (counts[:, positions[0]] - counts[:, positions[1]]) / n
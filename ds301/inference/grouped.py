@@ -0,0 +1,105 @@
+"""Hypothesis tests between the groups of a long table, i.e. one row per subject with a group column and an outcome
+column. The counts or moments of all the groups are computed in a single pass over the data, and every pair of groups is
+tested at once with the batch functions of `hypothesis`, followed by a multiple comparisons correction.
+"""
+
+import numpy as np
+import pandas as pd
+from typing import Hashable, Tuple
+from ds301.inference.hypothesis import adjust_p_values, two_mean_test_batch, two_proportions_test_batch
+from ds301.inference.moments import SummaryStatistics
+
+
+def pairwise_proportions_test(data: pd.DataFrame, group: Hashable, outcome: Hashable, success, alternative: str,
+                              control=None, correction: str = 'holm') -> pd.DataFrame:
+    """Performs a two proportions test between every pair of groups, or between every group and a control group
+
+    Args:
+        data: DataFrame with one row per subject
+        group: Column with the group of each subject. Rows with a missing group are ignored.
+        outcome: Column with the categorical outcome of each subject. Rows with a missing outcome are ignored.
+        success: Category of `outcome` whose proportion is compared
+        alternative: 'less', 'greater', or 'two-sided'. The Null Hypothesis of each test is `p1 - p2 = 0`
+        control: Optional group used as `p2` in every test, against each one of the other groups as `p1`. By default,
+            all the pairs of groups are tested, in the sorted order of the groups.
+        correction: Multiple comparisons correction of `adjust_p_values`, 'holm' (default), 'bonferroni' or 'bh'. None
+            doesn't adjust the p-values.
+
+    Returns:
+        DataFrame with one row per test and the columns group-1, group-2, n1, n2, p1, p2, z, p-value,
+        adjusted-p-value (unless `correction` is None) and conditions-met
+
+    Example:
+        >>> pairwise_proportions_test(cocaine_data, group='Drug', outcome='Relapse', success='no',
+        ...                           alternative='greater', control='Placebo')
+    """
+    valid = data[outcome].notna().to_numpy()
+    codes, groups = _factorize(data[group], valid)
+    n = np.bincount(codes[codes >= 0], minlength=len(groups))
+    x = np.bincount(codes[codes >= 0], weights=(data[outcome] == success).to_numpy()[codes >= 0],
+                    minlength=len(groups))
+    first, second = _pairs(groups, control)
+    result = two_proportions_test_batch(x[first], n[first], x[second], n[second], alternative=alternative)
+    return _results_table(groups, first, second, {'n1': n[first], 'n2': n[second], 'p1': x[first] / n[first],
+                                                  'p2': x[second] / n[second], 'z': result['z']},
+                          result, correction)
+
+
+def pairwise_means_test(data: pd.DataFrame, group: Hashable, value: Hashable, alternative: str, control=None,
+                        correction: str = 'holm', **args) -> pd.DataFrame:
+    """Performs a two mean test between every pair of groups, or between every group and a control group
+
+    Args:
+        data: DataFrame with one row per subject
+        group: Column with the group of each subject. Rows with a missing group are ignored.
+        value: Numeric column with the observation of each subject. Missing values are ignored.
+        alternative: 'less', 'greater', or 'two-sided'. The Null Hypothesis of each test is `X1 - X2 = 0`
+        control: Optional group used as `X2` in every test, against each one of the other groups as `X1`. By default,
+            all the pairs of groups are tested, in the sorted order of the groups.
+        correction: Multiple comparisons correction of `adjust_p_values`, 'holm' (default), 'bonferroni' or 'bh'. None
+            doesn't adjust the p-values.
+        **args: Same optional parameters as `two_mean_test`, i.e. `df='satterthwait'`
+
+    Returns:
+        DataFrame with one row per test and the columns group-1, group-2, n1, n2, mean1, mean2, t, df, p-value,
+        adjusted-p-value (unless `correction` is None) and conditions-met
+
+    Example:
+        >>> pairwise_means_test(immune_tea_data, group='Drink', value='InterferonGamma', alternative='greater',
+        ...                     control='Coffee')
+    """
+    codes, groups = _factorize(data[group], data[value].notna().to_numpy())
+    stats = SummaryStatistics.from_groups(data[value], codes, columns=list(groups))
+    first, second = _pairs(groups, control)
+    stats_1, stats_2 = stats.take(first), stats.take(second)
+    result = two_mean_test_batch(stats_1, stats_2, alternative=alternative, **args)
+    return _results_table(groups, first, second, {'n1': stats_1.count, 'n2': stats_2.count, 'mean1': stats_1.mean,
+                                                  'mean2': stats_2.mean, 't': result['t'], 'df': result['df']},
+                          result, correction)
+
+
+def _factorize(column: pd.Series, valid: np.ndarray) -> Tuple[np.ndarray, pd.Index]:
+    """Integer code of the group of each row, -1 for the rows that are missing or not valid, and the sorted groups"""
+    codes, groups = pd.factorize(column, sort=True)
+    return np.where(valid, codes, -1), groups
+
+
+def _pairs(groups: pd.Index, control) -> Tuple[np.ndarray, np.ndarray]:
+    """Positions of the first and second group of every test"""
+    if control is None:
+        return np.triu_indices(len(groups), k=1)
+    if control not in groups:
+        raise ValueError(f"control group {control!r} is not in the data")
+    position = groups.get_loc(control)
+    first = np.delete(np.arange(len(groups)), position)
+    return first, np.full(first.shape, position)
+
+
+def _results_table(groups: pd.Index, first: np.ndarray, second: np.ndarray, columns: dict, result: dict,
+                   correction: str) -> pd.DataFrame:
+    table = pd.DataFrame({'group-1': groups[first], 'group-2': groups[second], **columns,
+                          'p-value': result['p-value']})
+    if correction is not None:
+        table['adjusted-p-value'] = adjust_p_values(table['p-value'].to_numpy(), method=correction)
+    table['conditions-met'] = np.broadcast_to(result['conditions'].met, first.shape)
+    return table
@@ -0,0 +1,347 @@
+from __future__ import annotations
+import numpy as np
+from typing import TYPE_CHECKING, Dict, Tuple, Union
+from ds301.inference import kernels
+from ds301.inference.moments import SummaryStatistics, summarize
+from ds301.tools.helpers import validate_conditions_for_theoretical_distns
+from ds301.tools.instrumentation import instrument
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+@instrument
+def get_p_value(ha_parameter: float, distribution: str = 'norm', alternative: str = 'less', **kwargs) -> float:
+    """Calculates the p-value for a test
+
+    Args:
+        ha_parameter: Value of the Alternate Hypothesis parameter
+        distribution: Theoretical distribution to use, currently it only supports 't' or 'norm'
+        alternative: Defines the alternative hypothesis. Possible values: 'less' (default), 'greater', or 'two-sided'.
+        **kwargs: All the extra parameters will be packed in kwargs, i.e. df for degrees of freedom in the "t" dist
+
+    Returns:
+        The calculated p-value
+    """
+    if alternative == 'greater':
+        p_value = kernels.sf(ha_parameter, distribution, **kwargs)
+    elif alternative == 'less':
+        p_value = kernels.cdf(ha_parameter, distribution, **kwargs)
+    elif alternative == 'two-sided':
+        # Two-sided only makes sense when two variables are involved. i.e. Difference of means or proportions, slope,
+        # correlation, etc. Otherwise, the computed result will be greater than 1, and given that the p-value is a
+        # probability, it should be less or equal than 1.
+        p_value = np.minimum(2 * kernels.sf(np.abs(ha_parameter), distribution, **kwargs), 1)
+    else:
+        raise ValueError("alternative must be 'less', 'greater' or 'two-sided'")
+    return p_value
+
+
+@instrument
+def single_mean_test(sample: Union[pd.Series, SummaryStatistics], mu_0: float, alternative: str) -> Dict[str, float]:
+    """Performs a single mean test
+
+    Args:
+        sample: Numeric variable with the values in a Pandas Series, or its `SummaryStatistics`
+        mu_0: Mean from the Null Hypothesis
+        alternative: Defines the alternative hypothesis. Possible values: 'less', 'greater', or 'two-sided'.
+
+    Returns:
+        Dict with the calculated "t" parameter and the p-value
+    """
+    _statistics = summarize(sample)
+    t, df = _single_mean_t(_statistics['count'], _statistics['mean'], _statistics['std'], mu_0)
+    validate_conditions_for_theoretical_distns(inference_type='single-mean', n=_statistics['count'])
+    return {'t': t, 'p-value': get_p_value(t, distribution='t', alternative=alternative, df=df)}
+
+
+@instrument
+def single_proportion_test(sample: pd.Series, category: str, p_0: float, alternative: str) -> Dict[str, float]:
+    """Performs a single proportion test
+
+    Args:
+        sample: Series with the count of two categorical variables. Check the example below for details.
+        category: The name of the category we want to use for the test.
+        p_0: The proportion of the Null Hypothesis
+        alternative: Defines the alternative hypothesis. Possible values: 'less', 'greater', or 'two-sided'.
+
+    Returns:
+        Dict with the calculated "z" parameter and the p-value
+
+    Example:
+        The following is an example of the format required for the `sample` parameter. The index values (yes, no) are
+        the categories, and the values are the count of elements in each category::
+
+            >>> sample
+            Out[1]:
+            Relapse
+            no      4
+            yes    20
+            Name: Drug, dtype: int64
+    """
+    n = sample.sum()
+    p_hat = sample[category] / n
+    z = _single_proportion_z(sample[category], n, p_0)
+    validate_conditions_for_theoretical_distns(inference_type='single-proportion', n=n, p=p_hat)
+    return {'z': z, 'p-value': get_p_value(z, alternative=alternative)}
+
+
+@instrument
+def two_mean_test(data_stats: Union[pd.DataFrame, Dict[str, SummaryStatistics], SummaryStatistics],
+                  categories: Tuple[str, str], alternative: str, **args) -> Dict[str, float]:
+    """Performs a two mean test
+
+    Args:
+        data_stats: Summaary Statistics of two numerical variables. Check the example below for details.
+        categories: A Tuple with the name of the categories required to use the test. The order is important, the first
+            element of the Tuple will be `X1` and the second element will be `X2`. The Null Hypothesis is `X1 - X2 = 0`
+        alternative: 'less', 'greater', or 'two-sided'.
+        **args: Optional parameters will be packed in `args`. Currently, there is only one optional parameter:
+            `df`, which is used to specify how to calculate the degrees of freedom for the t-distribution. If the value
+            of df is set to `satterthwait`, the Satterthwait approximation will be used. Any other values will result in
+            the minimum of `n1-1` or `n2-1`
+
+    Returns:
+        Dict with the calculated "t" parameter and the p-value
+
+    Example:
+        The following is an example of the format required for the `data_stats` parameter. The index values are the
+        descriptive statistics of the numeric variable and it must include `count`, `mean`, and `std`. It can easily be
+        generated with the `pandas.DataFrame.describe` method::
+
+            >>> data_stats
+            Out[1]:
+            Drink     Coffee        Tea
+            count  10.000000  11.000000
+            mean   17.700000  34.818182
+            std    16.693645  21.084678
+            ...
+            max    52.000000  58.000000
+
+    """
+    set_a = data_stats.get(categories[0])
+    set_b = data_stats.get(categories[1])
+    n1 = set_a['count']
+    n2 = set_b['count']
+    t, df = _two_means_t(n1, set_a['mean'], set_a['std'], n2, set_b['mean'], set_b['std'],
+                         satterthwait=args.get('df') == 'satterthwait')
+    validate_conditions_for_theoretical_distns(inference_type='two-means', n1=n1, n2=n2)
+    return {'t': t, 'p-value': get_p_value(t, distribution='t', df=df, alternative=alternative)}
+
+
+@instrument
+def two_proportions_test(sample: pd.Series, categories: Tuple[str, str], alternative: str) -> Dict[str, float]:
+    """Performs a two proportions test
+
+    Args:
+        sample: Series with the count of two categorical variables. Check the example below for details.
+        categories: A Tuple with the name of the categories required to use the test. The order is important, the first
+            element of the Tuple will be used for `p1` and the second element for `p2`. The Null Hypothesis is
+            `X1 - X2 = 0`
+        alternative: 'less', 'greater', or 'two-sided'.
+
+    Returns:
+        Dict with the calculated "z" parameter and the p-value
+
+    Example:
+        The following is an example of the format for the `sample` parameter. Similarly to `single_proportion_test`, the
+        index values (Desipramine, Lithium, Placebo) are the categories, and the values are the count of elements in
+        each category. The `two_proportions_test`, requires at least three categories::
+
+            >>> sample
+            Out[1]:
+            Drug
+            Desipramine    14
+            Lithium         6
+            Placebo         4
+            Name: Relapse, dtype: int64
+
+    """
+    n = sample.sum()
+    n1 = sample[categories[0]]
+    n2 = sample[categories[1]]
+    p1_hat = n1 / n
+    p2_hat = n2 / n
+    z = _two_proportions_z(n1, n, n2, n)
+    validate_conditions_for_theoretical_distns(inference_type='two-proportions', x1=(n1, p1_hat), x2=(n2, p2_hat))
+    return {'z': z, 'p-value': get_p_value(z, alternative=alternative)}
+
+
+@instrument
+def single_mean_test_batch(data: Union[pd.DataFrame, np.ndarray, SummaryStatistics], mu_0: Union[float, np.ndarray],
+                           alternative: str) -> Dict[str, np.ndarray]:
+    """Performs a single mean test on every column of `data` at once
+
+    Args:
+        data: Wide DataFrame or 2-D array with one numeric variable per column and one observation per row. Missing
+            values (NaN) are ignored, so the columns may have different sample sizes. It can also be the
+            `SummaryStatistics` accumulated over such a table.
+        mu_0: Mean from the Null Hypothesis, either a single value or one value per column
+        alternative: Defines the alternative hypothesis. Possible values: 'less', 'greater', or 'two-sided'.
+
+    Returns:
+        Dict with arrays of the calculated "t" parameters, the degrees of freedom "df" and the p-values, in the order of
+        the columns, and the `ConditionDiagnostics` of the theoretical distribution in "conditions"
+    """
+    count, mean, std = _column_moments(data)
+    t, df = _single_mean_t(count, mean, std, mu_0)
+    conditions = validate_conditions_for_theoretical_distns(inference_type='single-mean', n=count)
+    return {'t': t, 'df': df, 'p-value': get_p_value(t, distribution='t', alternative=alternative, df=df),
+            'conditions': conditions}
+
+
+@instrument
+def single_proportion_test_batch(x: np.ndarray, n: np.ndarray, p_0: Union[float, np.ndarray],
+                                 alternative: str) -> Dict[str, np.ndarray]:
+    """Performs many single proportion tests at once
+
+    Args:
+        x: Array with the count of elements in the category of interest for each problem
+        n: Array with the total count of elements for each problem
+        p_0: The proportion of the Null Hypothesis, either a single value or one value per problem
+        alternative: Defines the alternative hypothesis. Possible values: 'less', 'greater', or 'two-sided'.
+
+    Returns:
+        Dict with arrays of the calculated "z" parameters and the p-values, and the `ConditionDiagnostics` of the
+        theoretical distribution in "conditions"
+    """
+    x, n = np.asarray(x), np.asarray(n)
+    z = _single_proportion_z(x, n, p_0)
+    conditions = validate_conditions_for_theoretical_distns(inference_type='single-proportion', n=n, p=x / n)
+    return {'z': z, 'p-value': get_p_value(z, alternative=alternative), 'conditions': conditions}
+
+
+@instrument
+def two_mean_test_batch(data_1: Union[pd.DataFrame, np.ndarray, SummaryStatistics],
+                        data_2: Union[pd.DataFrame, np.ndarray, SummaryStatistics],
+                        alternative: str, **args) -> Dict[str, np.ndarray]:
+    """Performs a two mean test for every pair of columns of `data_1` and `data_2` at once, i.e. the same metrics
+    measured in two groups. The Null Hypothesis of each test is `X1 - X2 = 0`.
+
+    Args:
+        data_1: Wide DataFrame or 2-D array with the observations of the first group, one variable per column, or its
+            `SummaryStatistics`
+        data_2: Wide DataFrame or 2-D array with the observations of the second group. It must have the same number of
+            columns as `data_1`, but it may have a different number of rows. Missing values (NaN) are ignored.
+        alternative: 'less', 'greater', or 'two-sided'.
+        **args: Same optional parameters as `two_mean_test`, i.e. `df='satterthwait'`
+
+    Returns:
+        Dict with arrays of the calculated "t" parameters, the degrees of freedom "df" and the p-values, in the order of
+        the columns, and the `ConditionDiagnostics` of the theoretical distribution in "conditions"
+    """
+    n1, mean1, std1 = _column_moments(data_1)
+    n2, mean2, std2 = _column_moments(data_2)
+    t, df = _two_means_t(n1, mean1, std1, n2, mean2, std2, satterthwait=args.get('df') == 'satterthwait')
+    conditions = validate_conditions_for_theoretical_distns(inference_type='two-means', n1=n1, n2=n2)
+    return {'t': t, 'df': df, 'p-value': get_p_value(t, distribution='t', df=df, alternative=alternative),
+            'conditions': conditions}
+
+
+@instrument
+def two_proportions_test_batch(x1: np.ndarray, n1: np.ndarray, x2: np.ndarray, n2: np.ndarray,
+                               alternative: str) -> Dict[str, np.ndarray]:
+    """Performs many two proportions tests at once, using the pooled proportion for the standard error. The Null
+    Hypothesis of each test is `p1 - p2 = 0`, with `p1 = x1 / n1` and `p2 = x2 / n2`.
+
+    Args:
+        x1: Array with the count of elements in the category of interest in the first group
+        n1: Array with the total count of elements in the first group
+        x2: Array with the count of elements in the category of interest in the second group
+        n2: Array with the total count of elements in the second group
+        alternative: 'less', 'greater', or 'two-sided'.
+
+    Returns:
+        Dict with arrays of the calculated "z" parameters and the p-values, and the `ConditionDiagnostics` of the
+        theoretical distribution in "conditions"
+    """
+    x1, n1, x2, n2 = (np.asarray(v) for v in (x1, n1, x2, n2))
+    z = _two_proportions_z(x1, n1, x2, n2)
+    conditions = validate_conditions_for_theoretical_distns(inference_type='two-proportions', x1=(n1, x1 / n1),
+                                                            x2=(n2, x2 / n2))
+    return {'z': z, 'p-value': get_p_value(z, alternative=alternative), 'conditions': conditions}
+
+
+def adjust_p_values(p_values: np.ndarray, method: str = 'holm') -> np.ndarray:
+    """Adjusts the p-values of a family of tests for multiple comparisons
+
+    Args:
+        p_values: Array with the p-values of the tests. Missing values (NaN) are kept, and don't count as tests.
+        method: 'holm' (default) controls the family-wise error rate with the Holm-Bonferroni step-down procedure,
+            'bonferroni' with the Bonferroni correction, and 'bh' controls the false discovery rate with the
+            Benjamini-Hochberg step-up procedure.
+
+    Returns:
+        Array with the adjusted p-values, in the same order as `p_values`. A test is rejected at level alpha when its
+        adjusted p-value is below alpha.
+    """
+    if method not in ('holm', 'bonferroni', 'bh'):
+        raise ValueError("method must be 'holm', 'bonferroni' or 'bh'")
+    p_values = np.asarray(p_values, dtype=float)
+    adjusted = np.full(p_values.shape, np.nan)
+    tested = ~np.isnan(p_values)
+    m = np.count_nonzero(tested)
+    if m == 0:
+        return adjusted
+    order = np.argsort(p_values[tested], kind='stable')
+    ranked = p_values[tested][order]
+    rank = np.arange(1, m + 1)
+    if method == 'holm':
+        ranked = np.maximum.accumulate((m - rank + 1) * ranked)
+    elif method == 'bonferroni':
+        ranked = m * ranked
+    else:
+        ranked = np.minimum.accumulate((m / rank * ranked)[::-1])[::-1]
+    # Undo the sorting
+    unsorted = np.empty(m)
+    unsorted[order] = np.minimum(ranked, 1)
+    adjusted[tested] = unsorted
+    return adjusted
+
+
+def _column_moments(data: Union[pd.DataFrame, np.ndarray, SummaryStatistics]) -> Tuple[np.ndarray, np.ndarray,
+                                                                                         np.ndarray]:
+    """Count, mean and sample standard deviation of each column, ignoring missing values"""
+    if isinstance(data, SummaryStatistics):
+        return np.atleast_1d(data.count), np.atleast_1d(data.mean), np.atleast_1d(data.std)
+    values = np.asarray(data, dtype=float)
+    if values.ndim == 1:
+        values = values[:, np.newaxis]
+    missing = np.isnan(values)
+    if not missing.any():
+        count = np.full(values.shape[1], values.shape[0])
+        return count, values.mean(axis=0), values.std(axis=0, ddof=1)
+    count = values.shape[0] - missing.sum(axis=0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return count, np.nanmean(values, axis=0), np.nanstd(values, axis=0, ddof=1)
+
+
+def _single_mean_t(count, mean, std, mu_0):
+    t = (mean - mu_0) / (std / np.sqrt(count))
+    return t, count - 1
+
+
+def _single_proportion_z(x, n, p_0):
+    _SE = np.sqrt(p_0 * (1 - p_0) / n)
+    return (x / n - p_0) / _SE
+
+
+def _two_means_t(n1, mean1, std1, n2, mean2, std2, satterthwait: bool = False):
+    _SE, df = _two_means_se(n1, std1, n2, std2, satterthwait)
+    return (mean1 - mean2) / _SE, df
+
+
+def _two_means_se(n1, std1, n2, std2, satterthwait: bool = False):
+    """Standard error of the difference of two means, and the degrees of freedom of its t distribution"""
+    v1 = std1 ** 2 / n1
+    v2 = std2 ** 2 / n2
+    if satterthwait:
+        df = (v1 + v2) ** 2 / (v1 ** 2 / (n1 - 1) + v2 ** 2 / (n2 - 1))
+    else:
+        df = np.minimum(n1 - 1, n2 - 1)
+    return np.sqrt(v1 + v2), df
+
+
+def _two_proportions_z(x1, n1, x2, n2):
+    p_bar = (x1 + x2) / (n1 + n2)
+    _SE = np.sqrt(p_bar * (1 - p_bar) * (1 / n1 + 1 / n2))
+    return (x1 / n1 - x2 / n2) / _SE
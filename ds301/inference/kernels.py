@@ -0,0 +1,52 @@
+"""Thin wrappers over the `scipy.special` primitives behind the normal and t distributions. The frozen distributions
+of `scipy.stats` validate their arguments on every call, which costs tens of microseconds per scalar; these kernels call
+the underlying ufuncs directly, and memoize the quantiles, since the same (confidence level, df) pairs are looked up
+over and over. Upper tails are computed with the survival functions instead of `1 - cdf`, which keeps their precision
+for small p-values. SciPy is only imported the first time a kernel is called.
+"""
+
+from functools import lru_cache
+import numpy as np
+from ds301.tools.lazy import LazyModule
+
+sp = LazyModule('scipy.special')
+
+
+def cdf(x, distribution: str = 'norm', df=None):
+    """Lower tail probability, P(X <= x), of the standard normal ('norm') or the t distribution with `df` degrees of
+    freedom ('t'). Any other `distribution` is treated as normal. Broadcasts over arrays."""
+    if distribution == 't':
+        return sp.stdtr(df, x)
+    return sp.ndtr(x)
+
+
+def sf(x, distribution: str = 'norm', df=None):
+    """Upper tail probability, P(X > x). Both distributions are symmetric, so it is the cdf evaluated at -x."""
+    return cdf(np.negative(x), distribution, df)
+
+
+def norm_ppf(q):
+    """Quantile of the standard normal distribution. Scalars are memoized."""
+    try:
+        return _norm_ppf(q)
+    except TypeError:
+        # Arrays are not hashable
+        return sp.ndtri(q)
+
+
+def t_ppf(q, df):
+    """Quantile of the t distribution with `df` degrees of freedom. Scalars are memoized."""
+    try:
+        return _t_ppf(q, df)
+    except TypeError:
+        return sp.stdtrit(df, q)
+
+
+@lru_cache(maxsize=1024)
+def _norm_ppf(q: float) -> float:
+    return sp.ndtri(q)
+
+
+@lru_cache(maxsize=4096)
+def _t_ppf(q: float, df: float) -> float:
+    return sp.stdtrit(df, q)
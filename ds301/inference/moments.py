@@ -0,0 +1,171 @@
+"""Streaming summary statistics for the inference functions. The t-tests and intervals only need the count, the mean and
+the standard deviation of a variable, so instead of a fully materialized Series (or a `describe()` frame, which also
+sorts the data to compute quantiles) they can receive a `SummaryStatistics` accumulated from chunks of data.
+"""
+
+from __future__ import annotations
+import numpy as np
+from typing import TYPE_CHECKING, Hashable, Sequence, Union
+from ds301.tools.instrumentation import instrument
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+class SummaryStatistics:
+    """Accumulates the count, mean and sum of squared deviations of one or more numeric variables in a single pass,
+    using the pairwise update of Chan et al., which is numerically stable even for millions of chunks. Two accumulators
+    can be merged, so partial results computed in different processes or nodes can be combined.
+
+    Missing values (NaN) are ignored, as in `pandas.DataFrame.describe`. The statistics can be read with the same keys
+    as a `describe()` frame, i.e. `stats['mean']`, so an accumulator can be used anywhere the inference functions expect
+    summary statistics.
+
+    Example:
+        Computing the statistics of a column of a CSV file that doesn't fit in memory::
+
+            >>> stats = SummaryStatistics()
+            >>> for chunk in pd.read_csv('data.csv', usecols=['Age'], chunksize=10 ** 6):
+            ...     stats.update(chunk['Age'])
+            >>> hypothesis.single_mean_test(stats, mu_0=50, alternative='less')
+
+    Args:
+        columns: Optional names of the variables, when the accumulator tracks more than one. It is inferred from the
+            first chunk if that chunk is a DataFrame.
+    """
+
+    def __init__(self, columns: Sequence[Hashable] = None):
+        self.columns = list(columns) if columns is not None else None
+        self._count = None
+        self._mean = None
+        self._m2 = None
+
+    @classmethod
+    def from_data(cls, data: Union[pd.Series, pd.DataFrame, np.ndarray]) -> 'SummaryStatistics':
+        return cls().update(data)
+
+    @classmethod
+    def from_groups(cls, values: Union[pd.Series, np.ndarray], codes: np.ndarray,
+                    columns: Sequence[Hashable] = None) -> 'SummaryStatistics':
+        """Accumulator with one variable per group of a long table, computed with two passes of `numpy.bincount`
+        instead of one pandas operation per group.
+
+        Args:
+            values: Observations of the variable
+            codes: Group of each observation, as integer codes in [0, number of groups), i.e. from `pandas.factorize`.
+                Observations with a negative code are ignored, as well as missing values.
+            columns: Optional names of the groups, in the order of their codes
+        """
+        values = np.asarray(values, dtype=float)
+        codes = np.asarray(codes)
+        valid = (codes >= 0) & ~np.isnan(values)
+        values, codes = values[valid], codes[valid]
+        groups = len(columns) if columns is not None else (int(codes.max()) + 1 if codes.size else 0)
+        count = np.bincount(codes, minlength=groups)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = np.bincount(codes, weights=values, minlength=groups) / count
+        m2 = np.bincount(codes, weights=(values - mean[codes]) ** 2, minlength=groups)
+        return cls(columns)._combine(count, mean, m2)
+
+    def update(self, chunk: Union[pd.Series, pd.DataFrame, np.ndarray]) -> 'SummaryStatistics':
+        """Adds a chunk of observations. A 1-D chunk is one variable; a DataFrame or 2-D array has one variable per
+        column and one observation per row.
+
+        Returns:
+            The accumulator itself, so calls can be chained
+        """
+        # Only DataFrames have column names. Checked by attribute, so that numpy users don't need to import pandas
+        if self.columns is None and self._count is None and hasattr(chunk, 'columns'):
+            self.columns = list(chunk.columns)
+        values = np.asarray(chunk, dtype=float)
+        missing = np.isnan(values)
+        count = values.shape[0] - missing.sum(axis=0)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            if missing.any():
+                mean = np.nanmean(values, axis=0)
+                m2 = np.nansum((values - mean) ** 2, axis=0)
+            else:
+                mean = values.mean(axis=0)
+                m2 = ((values - mean) ** 2).sum(axis=0)
+        return self._combine(count, mean, m2)
+
+    def merge(self, other: 'SummaryStatistics') -> 'SummaryStatistics':
+        """Adds the observations summarized by another accumulator of the same variables
+
+        Returns:
+            The accumulator itself, so calls can be chained
+        """
+        if other._count is None:
+            return self
+        if self.columns is None:
+            self.columns = other.columns
+        return self._combine(other._count, other._mean, other._m2)
+
+    def _combine(self, count, mean, m2) -> 'SummaryStatistics':
+        if self._count is None:
+            self._count, self._mean, self._m2 = np.asarray(count), np.nan_to_num(mean), np.asarray(m2)
+            return self
+        total = self._count + count
+        delta = np.nan_to_num(mean) - self._mean
+        with np.errstate(invalid='ignore', divide='ignore'):
+            weight = np.where(total > 0, count / total, 0)
+        self._mean = self._mean + delta * weight
+        self._m2 = self._m2 + m2 + delta ** 2 * self._count * weight
+        self._count = total
+        return self
+
+    @property
+    def count(self):
+        return self._count[()] if self._count is not None else 0
+
+    @property
+    def mean(self):
+        if self._count is None:
+            return np.nan
+        return np.where(self._count > 0, self._mean, np.nan)[()]
+
+    @property
+    def var(self):
+        """Sample variance, with `count - 1` degrees of freedom"""
+        if self._count is None:
+            return np.nan
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(self._count > 1, self._m2 / (self._count - 1), np.nan)[()]
+
+    @property
+    def std(self):
+        return np.sqrt(self.var)
+
+    def __getitem__(self, statistic: str):
+        if statistic not in ('count', 'mean', 'std', 'var'):
+            raise KeyError(statistic)
+        return getattr(self, statistic)
+
+    def get(self, column: Hashable, default=None):
+        """Accumulator of a single variable, selected by column name. Mirrors `pandas.DataFrame.get`, so a multi-column
+        accumulator can replace the `describe()` frame used by `two_mean_test`.
+        """
+        if self.columns is None or column not in self.columns:
+            return default
+        position = self.columns.index(column)
+        selected = SummaryStatistics()
+        selected._count, selected._mean, selected._m2 = (a[position] for a in (self._count, self._mean, self._m2))
+        return selected
+
+    def take(self, positions: Sequence[int]) -> 'SummaryStatistics':
+        """Accumulator of the variables at `positions`, which may repeat. Mirrors `pandas.DataFrame.take`"""
+        positions = np.asarray(positions, dtype=np.intp)
+        columns = [self.columns[position] for position in positions] if self.columns is not None else None
+        selected = SummaryStatistics(columns)
+        selected._count, selected._mean, selected._m2 = (a[positions] for a in (self._count, self._mean, self._m2))
+        return selected
+
+    def __repr__(self):
+        return f'SummaryStatistics(count={self.count}, mean={self.mean}, std={self.std})'
+
+
+@instrument
+def summarize(sample: Union[pd.Series, SummaryStatistics]) -> SummaryStatistics:
+    """Summary statistics of a sample, unless they were already computed"""
+    if isinstance(sample, SummaryStatistics):
+        return sample
+    return SummaryStatistics.from_data(sample)
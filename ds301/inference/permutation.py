@@ -0,0 +1,183 @@
+"""Randomization tests, the simulation-based counterpart of the tests in `hypothesis.py`. The null distribution is
+generated in vectorized batches (optionally across a pool of processes), and the simulation can stop early once the
+p-value is clearly above or below alpha. Each test returns the null distribution, the p-value and its Monte Carlo error.
+"""
+
+from __future__ import annotations
+import functools
+import numpy as np
+from typing import TYPE_CHECKING, Callable, Dict, Tuple
+from ds301.inference.resampling import iter_batches, observed_values, rows_per_chunk
+if TYPE_CHECKING:
+    import pandas as pd
+
+# Early stopping requires the p-value to be this many Monte Carlo standard errors away from alpha (~99.9% confidence)
+EARLY_STOPPING_Z = 3.29
+# Default number of permutations drawn between two checks of the early stopping rule
+BATCH_SIZE = 1000
+
+
+def two_means_permutation_test(sample_1: pd.Series, sample_2: pd.Series, alternative: str,
+                               n_permutations: int = 10000, alpha: float = None, **kwargs) -> Dict:
+    """Randomization test for the difference of two means. The Null Hypothesis is `mu1 - mu2 = 0`, and the null
+    distribution is generated by randomly reallocating the pooled values between the two groups.
+
+    Args:
+        sample_1: Numeric variable with the values of the first group in a Pandas Series. Missing values are ignored.
+        sample_2: Numeric variable with the values of the second group in a Pandas Series.
+        alternative: 'less', 'greater', or 'two-sided'.
+        n_permutations: Maximum number of permutations
+        alpha: Significance level. When given, the simulation stops as soon as the p-value is clearly above or below it
+        **kwargs: Optional parameters for the resampling engine: `seed`, `workers` (number of processes, None for all
+            the CPUs) and `batch_size` (number of permutations drawn with each random generator). Check
+            `ds301.inference.resampling.iter_batches` for details.
+
+    Returns:
+        Dict with the observed 'statistic' (`x1_bar - x2_bar`), the 'p-value', its Monte Carlo error 'mc-error', the
+        'null-distribution' and the number of permutations used 'n-permutations'
+    """
+    values_1 = observed_values(sample_1)
+    values_2 = observed_values(sample_2)
+    pooled = np.concatenate([values_1, values_2])
+    statistic = values_1.mean() - values_2.mean()
+    draw = functools.partial(_permute_mean_differences, pooled, values_1.shape[0])
+    return _randomization_test(statistic, 0, draw, alternative, n_permutations, alpha, **kwargs)
+
+
+def matched_pairs_permutation_test(differences: pd.Series, alternative: str, mu_0: float = 0,
+                                   n_permutations: int = 10000, alpha: float = None, **kwargs) -> Dict:
+    """Randomization test for the mean of paired differences. Under the Null Hypothesis, `mu_diff = mu_0`, the sign of
+    each difference (relative to `mu_0`) is equally likely to be positive or negative, so the null distribution is
+    generated by randomly flipping the signs.
+
+    Args:
+        differences: Numeric variable with the difference of each pair in a Pandas Series. Missing values are ignored.
+        alternative: 'less', 'greater', or 'two-sided'.
+        mu_0: Mean of the differences from the Null Hypothesis
+        n_permutations: Maximum number of sign flips
+        alpha: Significance level. When given, the simulation stops as soon as the p-value is clearly above or below it
+        **kwargs: Optional parameters for the resampling engine. Check `two_means_permutation_test`.
+
+    Returns:
+        Dict with the observed 'statistic' (mean of the differences), the 'p-value', 'mc-error', 'null-distribution'
+        and 'n-permutations'. Check `two_means_permutation_test`.
+    """
+    values = observed_values(differences)
+    draw = functools.partial(_flip_signs, values - mu_0, mu_0)
+    return _randomization_test(values.mean(), mu_0, draw, alternative, n_permutations, alpha, **kwargs)
+
+
+def single_proportion_randomization_test(sample: pd.Series, category: str, p_0: float, alternative: str,
+                                         n_permutations: int = 10000, alpha: float = None, **kwargs) -> Dict:
+    """Randomization test for a single proportion. The null distribution is the proportion of samples of the same size
+    drawn from a population where the proportion is `p_0`.
+
+    Args:
+        sample: Series with the count of two categorical variables, as in `hypothesis.single_proportion_test`.
+        category: The name of the category we want to use for the test.
+        p_0: The proportion of the Null Hypothesis
+        alternative: 'less', 'greater', or 'two-sided'.
+        n_permutations: Maximum number of simulated samples
+        alpha: Significance level. When given, the simulation stops as soon as the p-value is clearly above or below it
+        **kwargs: Optional parameters for the resampling engine. Check `two_means_permutation_test`.
+
+    Returns:
+        Dict with the observed 'statistic' (`p_hat`), the 'p-value', 'mc-error', 'null-distribution' and
+        'n-permutations'. Check `two_means_permutation_test`.
+    """
+    n = int(sample.sum())
+    draw = functools.partial(_draw_proportions, n, p_0)
+    return _randomization_test(sample[category] / n, p_0, draw, alternative, n_permutations, alpha, **kwargs)
+
+
+def two_proportions_permutation_test(sample: pd.Series, categories: Tuple[str, str], alternative: str,
+                                     n_permutations: int = 10000, alpha: float = None, **kwargs) -> Dict:
+    """Randomization test for the difference of two proportions, with the proportions defined as in
+    `hypothesis.two_proportions_test` (both over `n = sample.sum()`). Reallocating the pooled subjects between the two
+    groups at random means that the count of the first group follows a hypergeometric distribution, so each
+    permutation is drawn in O(1).
+
+    Args:
+        sample: Series with the count of the categorical variables. Check `hypothesis.two_proportions_test`.
+        categories: A Tuple with the name of the categories. The first element is used for `p1` and the second for `p2`
+        alternative: 'less', 'greater', or 'two-sided'.
+        n_permutations: Maximum number of permutations
+        alpha: Significance level. When given, the simulation stops as soon as the p-value is clearly above or below it
+        **kwargs: Optional parameters for the resampling engine. Check `two_means_permutation_test`.
+
+    Returns:
+        Dict with the observed 'statistic' (`p1_hat - p2_hat`), the 'p-value', 'mc-error', 'null-distribution' and
+        'n-permutations'. Check `two_means_permutation_test`.
+    """
+    n = int(sample.sum())
+    n1 = int(sample[categories[0]])
+    n2 = int(sample[categories[1]])
+    draw = functools.partial(_permute_proportion_differences, n, n1 + n2)
+    return _randomization_test((n1 - n2) / n, 0, draw, alternative, n_permutations, alpha, **kwargs)
+
+
+def _randomization_test(statistic: float, null_value: float, draw: Callable[[np.random.Generator, int], np.ndarray],
+                        alternative: str, n_permutations: int, alpha: float = None, **kwargs) -> Dict:
+    if alternative not in ('less', 'greater', 'two-sided'):
+        raise ValueError("alternative must be 'less', 'greater' or 'two-sided'")
+    kwargs.setdefault('batch_size', BATCH_SIZE)
+    # Tolerance for statistics that are equal to the observed one, but for floating point rounding
+    tolerance = 1e-9 * max(1, abs(statistic))
+    batches = []
+    n_less, n_greater = 0, 0
+    for batch in iter_batches(draw, n_permutations, **kwargs):
+        batches.append(batch)
+        n_less += np.count_nonzero(batch <= statistic + tolerance)
+        n_greater += np.count_nonzero(batch >= statistic - tolerance)
+        m = sum(b.shape[0] for b in batches)
+        # The observed statistic counts as one of the permutations, (k + 1) / (m + 1), so the p-value is never 0
+        p_value = _tail_p_value((n_less + 1) / (m + 1), (n_greater + 1) / (m + 1), alternative)
+        # Use at least a 1/m error, so a run without any extreme statistic isn't considered exact
+        _mc_error = np.sqrt(max(p_value * (1 - p_value), 1 / m) / m)
+        if alpha is not None and abs(p_value - alpha) > EARLY_STOPPING_Z * _mc_error:
+            break
+
+    null_distribution = np.concatenate(batches)
+    return {'statistic': statistic, 'p-value': p_value, 'mc-error': _mc_error, 'null-distribution': null_distribution,
+            'n-permutations': null_distribution.shape[0]}
+
+
+def _tail_p_value(p_less: float, p_greater: float, alternative: str) -> float:
+    if alternative == 'less':
+        return p_less
+    if alternative == 'greater':
+        return p_greater
+    # Same as the theoretical tests, two-sided doubles the smaller tail
+    return min(2 * min(p_less, p_greater), 1)
+
+
+def _permute_mean_differences(pooled: np.ndarray, n1: int, rng: np.random.Generator, size: int) -> np.ndarray:
+    n = pooled.shape[0]
+    total = pooled.sum()
+    differences = np.empty(size)
+    step = rows_per_chunk(n)
+    for start in range(0, size, step):
+        rows = min(step, size - start)
+        sum_1 = rng.permuted(np.broadcast_to(pooled, (rows, n)), axis=1)[:, :n1].sum(axis=1)
+        differences[start:start + rows] = sum_1 / n1 - (total - sum_1) / (n - n1)
+    return differences
+
+
+def _flip_signs(centered: np.ndarray, mu_0: float, rng: np.random.Generator, size: int) -> np.ndarray:
+    n = centered.shape[0]
+    means = np.empty(size)
+    step = rows_per_chunk(n)
+    for start in range(0, size, step):
+        rows = min(step, size - start)
+        signs = rng.integers(0, 2, size=(rows, n), dtype=np.int8) * 2 - 1
+        means[start:start + rows] = mu_0 + (signs @ centered) / n
+    return means
+
+
+def _draw_proportions(n: int, p_0: float, rng: np.random.Generator, size: int) -> np.ndarray:
+    return rng.binomial(n, p_0, size=size) / n
+
+
+def _permute_proportion_differences(n: int, successes: int, rng: np.random.Generator, size: int) -> np.ndarray:
+    count_1 = rng.hypergeometric(successes, 2 * n - successes, n, size=size)
+    return (2 * count_1 - successes) / n
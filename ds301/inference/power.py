@@ -0,0 +1,211 @@
+"""Power analysis and sample size planning for the four tests in `hypothesis.py`. The analytic power curves use the
+normal approximation and broadcast over all their parameters, so a whole design grid is evaluated in one vectorized
+pass. When the sample sizes are too small for the normal approximation (check `ds301.tools.helpers`), `simulated_power`
+estimates the power by running the batch tests over simulated datasets.
+"""
+
+from __future__ import annotations
+import warnings
+import numpy as np
+from typing import Callable, Dict
+from ds301.inference import hypothesis, kernels
+from ds301.inference.resampling import rows_per_chunk
+from ds301.tools.helpers import TheoreticalConditionNotMetWarning
+from ds301.tools.lazy import LazyModule
+
+pd = LazyModule('pandas')
+
+
+def single_mean_power(effect_size, n, alpha=0.05, alternative: str = 'two-sided') -> np.ndarray:
+    """Power of the single mean test
+
+    Args:
+        effect_size: Standardized difference between the true mean and the mean of the Null Hypothesis,
+            `(mu - mu_0) / sigma`
+        n: Sample size
+        alpha: Significance level
+        alternative: 'less', 'greater', or 'two-sided'.
+
+    Returns:
+        Array with the power for the broadcast combination of the parameters
+    """
+    return _power(np.asarray(effect_size) * np.sqrt(n), 1, 1, alpha, alternative)
+
+
+def single_proportion_power(p, p_0, n, alpha=0.05, alternative: str = 'two-sided') -> np.ndarray:
+    """Power of the single proportion test
+
+    Args:
+        p: True proportion
+        p_0: The proportion of the Null Hypothesis
+        n: Sample size
+        alpha: Significance level
+        alternative: 'less', 'greater', or 'two-sided'.
+
+    Returns:
+        Array with the power for the broadcast combination of the parameters
+    """
+    p, p_0, n = np.asarray(p), np.asarray(p_0), np.asarray(n)
+    return _power(p - p_0, np.sqrt(p_0 * (1 - p_0) / n), np.sqrt(p * (1 - p) / n), alpha, alternative)
+
+
+def two_means_power(effect_size, n, n2=None, alpha=0.05, alternative: str = 'two-sided') -> np.ndarray:
+    """Power of the two mean test
+
+    Args:
+        effect_size: Standardized difference of the true means, `(mu1 - mu2) / sigma`
+        n: Sample size of the first group
+        n2: Sample size of the second group. By default, the same as the first group
+        alpha: Significance level
+        alternative: 'less', 'greater', or 'two-sided'.
+
+    Returns:
+        Array with the power for the broadcast combination of the parameters
+    """
+    n2 = n if n2 is None else n2
+    return _power(np.asarray(effect_size) / np.sqrt(1 / np.asarray(n) + 1 / np.asarray(n2)), 1, 1, alpha, alternative)
+
+
+def two_proportions_power(p1, p2, n, n2=None, alpha=0.05, alternative: str = 'two-sided') -> np.ndarray:
+    """Power of the two proportions test, which uses the pooled proportion for the standard error
+
+    Args:
+        p1: True proportion of the first group
+        p2: True proportion of the second group
+        n: Sample size of the first group
+        n2: Sample size of the second group. By default, the same as the first group
+        alpha: Significance level
+        alternative: 'less', 'greater', or 'two-sided'.
+
+    Returns:
+        Array with the power for the broadcast combination of the parameters
+    """
+    p1, p2, n1 = np.asarray(p1), np.asarray(p2), np.asarray(n)
+    n2 = n1 if n2 is None else np.asarray(n2)
+    p_bar = (n1 * p1 + n2 * p2) / (n1 + n2)
+    _SE_0 = np.sqrt(p_bar * (1 - p_bar) * (1 / n1 + 1 / n2))
+    _SE_1 = np.sqrt(p1 * (1 - p1) / n1 + p2 * (1 - p2) / n2)
+    return _power(p1 - p2, _SE_0, _SE_1, alpha, alternative)
+
+
+POWER_FUNCTIONS = {
+    'single-mean': single_mean_power,
+    'single-proportion': single_proportion_power,
+    'two-means': two_means_power,
+    'two-proportions': two_proportions_power,
+}
+
+
+def power_grid(test: str, **grid) -> pd.DataFrame:
+    """Evaluates the analytic power over every combination of the parameters in `grid`, in a single vectorized call
+
+    Args:
+        test: 'single-mean', 'single-proportion', 'two-means' or 'two-proportions'
+        **grid: Values of each parameter of the power function, i.e. `effect_size=[0.2, 0.5], n=range(10, 500)`.
+            Scalars are accepted for the parameters that are fixed.
+
+    Returns:
+        DataFrame with one row per combination of the parameters, and their power
+    """
+    names = list(grid)
+    mesh = np.meshgrid(*(np.atleast_1d(grid[name]) for name in names), indexing='ij')
+    table = pd.DataFrame({name: values.ravel() for name, values in zip(names, mesh)})
+    table['power'] = np.ravel(POWER_FUNCTIONS[test](**{name: table[name].to_numpy() for name in names}))
+    return table
+
+
+def minimum_sample_size(test: str, power=0.8, n_max: int = 10 ** 9, **params) -> np.ndarray:
+    """Smallest sample size (per group, for the tests with two groups) that reaches the target power. The power
+    increases with `n`, so the root is found with a bisection over the integers, vectorized over all the parameters.
+
+    Args:
+        test: 'single-mean', 'single-proportion', 'two-means' or 'two-proportions'
+        power: Target power
+        n_max: Largest sample size considered
+        **params: Parameters of the power function other than `n`, which can be arrays that broadcast together
+
+    Returns:
+        Array with the minimum sample size for each combination of the parameters, NaN where `n_max` isn't enough
+    """
+    power_function = POWER_FUNCTIONS[test]
+    target = np.asarray(power)
+    shape = np.broadcast(target, *(np.asarray(value) for value in params.values())).shape
+    low = np.ones(shape, dtype=np.int64)
+    high = np.full(shape, n_max, dtype=np.int64)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        reached_at_low = power_function(n=low, **params) >= target
+        feasible = power_function(n=high, **params) >= target
+        while np.any(high - low > 1):
+            middle = (low + high) // 2
+            reached = power_function(n=middle, **params) >= target
+            high = np.where(reached, middle, high)
+            low = np.where(reached, low, middle)
+    return np.where(reached_at_low, 1, np.where(feasible, high, np.nan))
+
+
+def simulated_power(test: str, n_simulations: int = 10000, alpha: float = 0.05, alternative: str = 'two-sided',
+                    seed: int = None, sampler: Callable[[np.random.Generator, tuple], np.ndarray] = None,
+                    **params) -> Dict[str, float]:
+    """Estimates the power of a test as the rejection rate over simulated datasets. Useful when the conditions for the
+    theoretical distributions are not met and the analytic power is not reliable.
+
+    Args:
+        test: 'single-mean', 'single-proportion', 'two-means' or 'two-proportions'
+        n_simulations: Number of simulated datasets
+        alpha: Significance level
+        alternative: 'less', 'greater', or 'two-sided'.
+        seed: Seed for the random generator
+        sampler: For the tests of means, function called as `sampler(rng, shape)` that returns draws from the population
+            standardized to mean 0 and standard deviation 1, i.e. `lambda rng, shape: rng.exponential(size=shape) - 1`
+            for a skewed population. Standard normal by default.
+        **params: Same parameters as the analytic power function of the test, other than `alpha` and `alternative`
+
+    Returns:
+        Dict with the estimated 'power' and its Monte Carlo standard error 'mc-error'
+    """
+    rng = np.random.default_rng(seed)
+    sampler = sampler or (lambda generator, shape: generator.standard_normal(size=shape))
+    n = int(params['n'])
+    n2 = int(params.get('n2') or n)
+    rejections = 0
+    step = rows_per_chunk(n + n2) if test in ('single-mean', 'two-means') else n_simulations
+    # The warnings of the batch tests are exactly the situation this function is meant for
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', TheoreticalConditionNotMetWarning)
+        for start in range(0, n_simulations, step):
+            size = min(step, n_simulations - start)
+            if test == 'single-mean':
+                data = sampler(rng, (n, size)) + params['effect_size']
+                result = hypothesis.single_mean_test_batch(data, 0, alternative)
+            elif test == 'two-means':
+                data_1 = sampler(rng, (n, size)) + params['effect_size']
+                result = hypothesis.two_mean_test_batch(data_1, sampler(rng, (n2, size)), alternative)
+            elif test == 'single-proportion':
+                x = rng.binomial(n, params['p'], size=size)
+                result = hypothesis.single_proportion_test_batch(x, n, params['p_0'], alternative)
+            elif test == 'two-proportions':
+                x1 = rng.binomial(n, params['p1'], size=size)
+                x2 = rng.binomial(n2, params['p2'], size=size)
+                with np.errstate(invalid='ignore', divide='ignore'):
+                    result = hypothesis.two_proportions_test_batch(x1, n, x2, n2, alternative)
+            else:
+                raise ValueError(f"test must be one of {tuple(POWER_FUNCTIONS)}")
+            # Degenerate samples (i.e. no successes in either group) have no p-value and don't reject
+            rejections += np.count_nonzero(result['p-value'] <= alpha)
+    power = float(rejections / n_simulations)
+    return {'power': power, 'mc-error': float(np.sqrt(power * (1 - power) / n_simulations))}
+
+
+def _power(delta, se_0, se_1, alpha, alternative: str) -> np.ndarray:
+    """Probability of rejecting the Null Hypothesis when the statistic is normal with mean `delta` and standard error
+    `se_1`, and the rejection region uses the standard error under the Null Hypothesis `se_0`
+    """
+    alpha = np.asarray(alpha)
+    if alternative == 'greater':
+        return kernels.sf((kernels.norm_ppf(1 - alpha) * se_0 - delta) / se_1)
+    if alternative == 'less':
+        return kernels.cdf((-kernels.norm_ppf(1 - alpha) * se_0 - delta) / se_1)
+    if alternative == 'two-sided':
+        z_star = kernels.norm_ppf(1 - alpha / 2)
+        return kernels.sf((z_star * se_0 - delta) / se_1) + kernels.cdf((-z_star * se_0 - delta) / se_1)
+    raise ValueError("alternative must be 'less', 'greater' or 'two-sided'")
@@ -0,0 +1,88 @@
+"""Shared machinery for the simulation-based inference methods (bootstrap intervals and randomization tests). The
+resamples are drawn in vectorized batches, and every batch gets its own random generator spawned from a root seed, so
+the results for a given seed are the same whether the batches run in this process or across a pool of processes.
+"""
+
+from __future__ import annotations
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import TYPE_CHECKING, Callable, Iterator
+
+import numpy as np
+if TYPE_CHECKING:
+    import pandas as pd
+
+# Upper bound on the number of elements of the 2-D arrays materialized at once while drawing a batch (32 MB of float64)
+MAX_CHUNK_ELEMENTS = 2 ** 22
+
+
+def iter_batches(draw: Callable[[np.random.Generator, int], np.ndarray], n_resamples: int, batch_size: int = 10000,
+                 seed: int = None, workers: int = 1) -> Iterator[np.ndarray]:
+    """Draws `n_resamples` statistics in batches and yields the batches in order. The consumer can stop early, i.e. once
+    a p-value is clearly above or below alpha, and the batches that were not started yet are cancelled.
+
+    Args:
+        draw: Function called as `draw(rng, size)` that returns an array with `size` resampled statistics. It must be
+            picklable (i.e. a module level function or a `functools.partial` of one) when `workers` is not 1.
+        n_resamples: Total number of resamples
+        batch_size: Number of resamples drawn with each generator
+        seed: Root seed. When None, fresh entropy is taken from the OS
+        workers: Number of processes. 1 (default) draws everything in this process, and None uses all the CPUs
+
+    Returns:
+        Iterator over the arrays of statistics of each batch
+    """
+    sizes = [min(batch_size, n_resamples - start) for start in range(0, n_resamples, batch_size)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(sizes) == 1:
+        for batch_seed, size in zip(seeds, sizes):
+            yield draw(np.random.default_rng(batch_seed), size)
+        return
+
+    executor = ProcessPoolExecutor(max_workers=workers)
+    try:
+        # Keep a bounded number of batches in flight, so stopping early doesn't wait for the whole run
+        pending = deque()
+        tasks = iter(zip(seeds, sizes))
+        for batch_seed, size in tasks:
+            pending.append(executor.submit(_draw_batch, draw, batch_seed, size))
+            if len(pending) >= 2 * workers:
+                break
+        while pending:
+            batch = pending.popleft().result()
+            for batch_seed, size in tasks:
+                pending.append(executor.submit(_draw_batch, draw, batch_seed, size))
+                break
+            yield batch
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def _draw_batch(draw: Callable[[np.random.Generator, int], np.ndarray], batch_seed: np.random.SeedSequence,
+                size: int) -> np.ndarray:
+    return draw(np.random.default_rng(batch_seed), size)
+
+
+def rows_per_chunk(n: int) -> int:
+    """Number of resamples of `n` observations that fit in `MAX_CHUNK_ELEMENTS`"""
+    return max(1, MAX_CHUNK_ELEMENTS // max(n, 1))
+
+
+def observed_values(sample: pd.Series) -> np.ndarray:
+    """Values of a numeric sample as a float array, without the missing values"""
+    values = np.asarray(sample, dtype=float)
+    return values[~np.isnan(values)]
+
+
+def resample_means(values: np.ndarray, rng: np.random.Generator, size: int) -> np.ndarray:
+    """Means of `size` bootstrap resamples of `values`, drawn as a 2-D matrix of indices in chunks of rows"""
+    n = values.shape[0]
+    dtype = np.int32 if n < 2 ** 31 else np.int64
+    means = np.empty(size)
+    step = rows_per_chunk(n)
+    for start in range(0, size, step):
+        rows = min(step, size - start)
+        means[start:start + rows] = values[rng.integers(0, n, size=(rows, n), dtype=dtype)].mean(axis=1)
+    return means
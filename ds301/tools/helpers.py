@@ -0,0 +1,180 @@
+import os
+import sys
+import time
+import warnings
+import numpy as np
+from typing import Dict, Tuple
+from ds301.tools.instrumentation import instrument
+
+# Maximum number of warnings issued per inference type in each window of `WARNING_WINDOW_SECONDS`. Later failures in
+# the window are still reported in the diagnostics returned by the validation, but they are not sent to `warnings`, so
+# batch jobs don't flood their logs. The first warning of the next window tells how many were suppressed
+MAX_WARNINGS_PER_TYPE = 10
+WARNING_WINDOW_SECONDS = 60.0
+# Start of the current window, warnings issued and warnings suppressed in it, per inference type
+_warnings_issued: Dict[str, Tuple[float, int, int]] = {}
+# Warnings are attributed to the first caller outside of this directory
+_PACKAGE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__))) + os.sep
+
+
+class TheoreticalConditionNotMetWarning(UserWarning):
+    """Issued when the conditions to use a theoretical sampling distribution are not met. Use the standard `warnings`
+    filters to change how they are reported, i.e. `warnings.simplefilter('ignore', TheoreticalConditionNotMetWarning)`
+    """
+
+
+class ConditionDiagnostics:
+    """Result of validating the conditions of one or many problems of the same inference type
+
+    Args:
+        inference_type: 'single-mean', 'single-proportion', 'two-means' or 'two-proportions'
+        met: Boolean (or boolean array, for a batch of problems) that is True where the conditions are met
+    """
+
+    def __init__(self, inference_type: str, met):
+        self.inference_type = inference_type
+        self.met = np.asarray(met)
+
+    @property
+    def all_met(self) -> bool:
+        return bool(self.met.all())
+
+    @property
+    def n_failed(self) -> int:
+        return int(self.met.size - np.count_nonzero(self.met))
+
+    def __repr__(self):
+        return f'ConditionDiagnostics({self.inference_type!r}, failed={self.n_failed} of {self.met.size})'
+
+
+def single_mean_conditions(n) -> np.ndarray:
+    return np.asarray(n) >= 30
+
+
+def single_proportion_conditions(n, p) -> np.ndarray:
+    n, p = np.asarray(n), np.asarray(p)
+    return (n * p >= 10) & (n * (1 - p) >= 10)
+
+
+def two_means_conditions(n1, n2) -> np.ndarray:
+    return (np.asarray(n1) >= 30) & (np.asarray(n2) >= 30)
+
+
+def two_proportions_conditions(x1: Tuple, x2: Tuple) -> np.ndarray:
+    return single_proportion_conditions(*x1) & single_proportion_conditions(*x2)
+
+
+CONDITIONS = {
+    'single-mean': single_mean_conditions,
+    'single-proportion': single_proportion_conditions,
+    'two-means': two_means_conditions,
+    'two-proportions': two_proportions_conditions,
+}
+
+
+def check_conditions(inference_type: str, **kwargs) -> ConditionDiagnostics:
+    """Vectorized check of the conditions for theoretical distributions. Accepts arrays with the parameters of a batch
+    of problems, and never issues warnings.
+    """
+    return ConditionDiagnostics(inference_type, CONDITIONS[inference_type](**kwargs))
+
+
+@instrument('helpers.validate_conditions')
+def validate_conditions_for_theoretical_distns(inference_type: str, **kwargs) -> ConditionDiagnostics:
+    """Checks the conditions for theoretical distributions and issues a `TheoreticalConditionNotMetWarning` if they are
+    not met. For a single problem the warning details the sample values; for a batch of problems, a single warning
+    summarizes how many of them failed.
+
+    Returns:
+        The diagnostics of the check, or None for an unknown inference type
+    """
+    if inference_type not in CONDITIONS:
+        return None
+    diagnostics = check_conditions(inference_type, **kwargs)
+    if diagnostics.all_met:
+        return diagnostics
+    if diagnostics.met.ndim == 0:
+        _VALIDATORS[inference_type](**kwargs)
+    else:
+        _warn(inference_type, "Conditions for theoretical sampling distributions not met for "
+                              f"{diagnostics.n_failed} of {diagnostics.met.size} {inference_type} problems.")
+    return diagnostics
+
+
+def validate_single_mean_conditions(n: float):
+    if not single_mean_conditions(n):
+        error_msg = ("Conditions for theoretical sampling distributions not met: "
+                     f"Sample size n={n:.0f} is less than 30. ")
+        _warn('single-mean', error_msg)
+
+
+def validate_single_proportion_conditions(n: float, p: float):
+    if not single_proportion_conditions(n, p):
+        error_msg = ("Conditions for theoretical sampling distributions not met: n*p and n*(1-p) must be greater than "
+                     f"10. \nSample values: n*p={n:.0f}*{p:.2f}={n * p:.2f}, and "
+                     f"n*(1-p)={n:.0f}*{1 - p:.2f}={n * (1 - p):.2f}")
+        _warn('single-proportion', error_msg)
+
+
+def validate_two_means_conditions(n1: float, n2: float):
+    if not two_means_conditions(n1, n2):
+        error_msg = ("Conditions for theoretical sampling distributions not met: For each group n must be greater than "
+                     f"30. Sample size n1={n1:.0f}, and sample size n2={n2:.0f}")
+        _warn('two-means', error_msg)
+
+
+def validate_two_proportions_conditions(x1: Tuple, x2: Tuple):
+    n1, p1 = x1
+    n2, p2 = x2
+    if not two_proportions_conditions(x1, x2):
+        error_msg = ("Conditions for theoretical sampling distributions not met: For each group n*p and n*(1-p) must be"
+                     f" greater than 10. \nSample values: \n\tn1*p1={n1:.0f}*{p1:.2f}={n1 * p1:.2f}, "
+                     f"n1*(1-p1)={n1:.0f}*{1 - p1:.2f}={n1 * (1 - p1):.2f}, \n\t"
+                     f"n2 * p2={n2:.0f} * {p2:.2f}={n2 * p2:.2f}, "
+                     f"n2*(1-p2)={n2:.0f}*{1 - p2:.2f}={n2 * (1 - p2):.2f}"
+                     )
+        _warn('two-proportions', error_msg)
+
+
+_VALIDATORS = {
+    'single-mean': validate_single_mean_conditions,
+    'single-proportion': validate_single_proportion_conditions,
+    'two-means': validate_two_means_conditions,
+    'two-proportions': validate_two_proportions_conditions,
+}
+
+
+def reset_warning_limits():
+    """Starts a new window of `MAX_WARNINGS_PER_TYPE` warnings for each inference type right away"""
+    _warnings_issued.clear()
+
+
+def _warn(inference_type: str, message: str):
+    """Issues the warning, unless `MAX_WARNINGS_PER_TYPE` were already issued for the inference type in the current
+    window of `WARNING_WINDOW_SECONDS`. The warning points to the code that called the inference function (i.e.
+    `single_mean_test`), whatever the number of frames inside the package, which depends on the call path and on the
+    instrumentation wrappers.
+    """
+    now = time.monotonic()
+    window_start, issued, suppressed = _warnings_issued.get(inference_type, (now, 0, 0))
+    if now - window_start >= WARNING_WINDOW_SECONDS:
+        if suppressed:
+            message += (f"\n{suppressed} warnings for {inference_type} problems were suppressed since the limit was "
+                        "reached.")
+        window_start, issued, suppressed = now, 0, 0
+    if issued >= MAX_WARNINGS_PER_TYPE:
+        _warnings_issued[inference_type] = (window_start, issued, suppressed + 1)
+        return
+    _warnings_issued[inference_type] = (window_start, issued + 1, suppressed)
+    if issued + 1 == MAX_WARNINGS_PER_TYPE:
+        message += (f"\nFurther warnings for {inference_type} problems will be suppressed for up to "
+                    f"{WARNING_WINDOW_SECONDS:g} seconds.")
+    warnings.warn(message, TheoreticalConditionNotMetWarning, stacklevel=_external_stacklevel())
+
+
+def _external_stacklevel() -> int:
+    """Stack level of the first frame outside of the package, as seen from the caller of this function"""
+    frame, stacklevel = sys._getframe(1), 1
+    while frame.f_back is not None and frame.f_code.co_filename.startswith(_PACKAGE_DIR):
+        frame, stacklevel = frame.f_back, stacklevel + 1
+    return stacklevel
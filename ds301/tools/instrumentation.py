@@ -0,0 +1,299 @@
+"""Opt-in instrumentation of the simulation and inference hot paths. The functions decorated with `instrument` record
+their number of calls, their wall time and, optionally, the bytes they allocate (measured with `tracemalloc`). The times
+are inclusive, i.e. the time of `single_mean_test` includes the time of the `get_p_value` call inside it.
+
+It is disabled by default, and then a decorated function only pays for a check of a module flag. It is enabled for the
+whole process with the environment variable `DS301_INSTRUMENT=1` (or `DS301_INSTRUMENT=memory` to also count the
+allocations, which slows the code down), or for a block of code with the `instrumented` context manager::
+
+    >>> with instrumented(allocations=True):
+    ...     experiment.run_simulation()
+    >>> write_prometheus('/var/lib/node_exporter/ds301.prom')
+
+When `DS301_INSTRUMENT_OUTPUT` is also set, the metrics are written to that file when the process exits, as JSON if the
+name ends with `.json` and in the Prometheus text format otherwise. The worker processes of a pool (i.e.
+`python -m ds301 run --workers 8`) hand their metrics to the main process, which adds them to its own before writing the
+file, so a run always produces a single file.
+"""
+
+import atexit
+import contextlib
+import functools
+import json
+import os
+import time
+from typing import Any, Callable, Dict
+
+ENV_VARIABLE = 'DS301_INSTRUMENT'
+OUTPUT_ENV_VARIABLE = 'DS301_INSTRUMENT_OUTPUT'
+
+_enabled = False
+_allocations = False
+# Whether `enable` started tracemalloc, and so has to stop it: tracing slows down every allocation of the process
+_started_tracing = False
+_metrics: Dict[str, Dict[str, float]] = {}
+# Highest traced memory seen by each stage in progress, innermost last. tracemalloc keeps a single peak, which is reset
+# when a stage starts, so the stages around it take the peak of the inner stages from here
+_peaks = []
+
+
+def instrument(name: Any = None) -> Callable:
+    """Decorator that records the calls of a function as a stage of the instrumentation
+
+    Args:
+        name: Name of the stage. By default, the module and qualified name of the function, i.e.
+            'hypothesis.single_mean_test'. The decorator can also be used without parentheses.
+    """
+    if callable(name):
+        return instrument()(name)
+
+    def decorator(function: Callable) -> Callable:
+        stage = name or f'{function.__module__.rsplit(".", 1)[-1]}.{function.__qualname__}'
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return function(*args, **kwargs)
+            return _measure(stage, function, args, kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def enable(allocations: bool = False):
+    """Starts recording the instrumented stages
+
+    Args:
+        allocations: Also count the bytes allocated by each stage. It starts `tracemalloc` if it isn't tracing yet, and
+            then it is stopped again when the allocations are no longer counted.
+    """
+    global _enabled, _allocations, _started_tracing
+    import tracemalloc
+    if allocations and not tracemalloc.is_tracing():
+        tracemalloc.start()
+        _started_tracing = True
+    elif not allocations:
+        _stop_tracing()
+    _enabled, _allocations = True, allocations
+
+
+def disable():
+    """Stops recording. The metrics recorded so far are kept until `reset`"""
+    global _enabled, _allocations
+    _stop_tracing()
+    _enabled, _allocations = False, False
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def reset():
+    """Discards the metrics recorded so far"""
+    _metrics.clear()
+
+
+@contextlib.contextmanager
+def instrumented(allocations: bool = False, reset_metrics: bool = True):
+    """Context manager that enables the instrumentation inside its block, and restores the previous state after it
+
+    Args:
+        allocations: Also count the bytes allocated by each stage
+        reset_metrics: Discard the metrics recorded before the block
+
+    Returns:
+        The live metrics, as returned by `metrics`
+    """
+    previous = (_enabled, _allocations)
+    if reset_metrics:
+        reset()
+    enable(allocations)
+    try:
+        yield _metrics
+    finally:
+        if previous[0]:
+            enable(previous[1])
+        else:
+            disable()
+
+
+def metrics() -> Dict[str, Dict[str, float]]:
+    """Copy of the metrics of every stage: its calls, total and maximum seconds, and, when allocations are counted, the
+    bytes allocated by all its calls (the sum of the peak of each call over the memory in use when it started) and the
+    largest of those peaks
+    """
+    return {stage: dict(values) for stage, values in _metrics.items()}
+
+
+def to_json(path: str = None) -> str:
+    """Metrics as a JSON document, optionally written to `path`
+
+    Returns:
+        The JSON document
+    """
+    document = json.dumps({'stages': metrics()}, indent=2, sort_keys=True)
+    if path is not None:
+        _write_atomically(path, document + '\n')
+    return document
+
+
+def to_prometheus() -> str:
+    """Metrics in the Prometheus text exposition format, one time series per stage"""
+    series = (
+        ('calls', 'calls_total', 'counter', 'Number of calls of an instrumented stage'),
+        ('seconds', 'seconds_total', 'counter', 'Wall time spent in an instrumented stage'),
+        ('max-seconds', 'max_seconds', 'gauge', 'Longest call of an instrumented stage'),
+        ('allocated-bytes', 'allocated_bytes_total', 'counter', 'Bytes allocated by an instrumented stage'),
+        ('peak-bytes', 'peak_bytes', 'gauge', 'Largest allocation peak of a call of an instrumented stage'),
+    )
+    lines = []
+    for key, metric, metric_type, description in series:
+        samples = [(stage, values[key]) for stage, values in sorted(_metrics.items()) if key in values]
+        if not samples:
+            continue
+        lines += [f'# HELP ds301_stage_{metric} {description}', f'# TYPE ds301_stage_{metric} {metric_type}']
+        lines += [f'ds301_stage_{metric}{{stage="{_escape_label(stage)}"}} {value!r}' for stage, value in samples]
+    return '\n'.join(lines) + '\n'
+
+
+def write_prometheus(path: str):
+    """Writes the metrics in the Prometheus text format, i.e. for the textfile collector of the node exporter. The file
+    is replaced atomically, so the collector never reads a partial file.
+    """
+    _write_atomically(path, to_prometheus())
+
+
+def profile_run(path: str, function: Callable, *args, **kwargs):
+    """Runs `function(*args, **kwargs)` under `cProfile` and writes the statistics to `path`, to be read with `pstats`
+    or a viewer like snakeviz
+
+    Returns:
+        The result of the function
+    """
+    import cProfile
+    profiler = cProfile.Profile()
+    try:
+        return profiler.runcall(function, *args, **kwargs)
+    finally:
+        profiler.dump_stats(path)
+
+
+def _measure(stage: str, function: Callable, args, kwargs):
+    allocations = _allocations
+    if allocations:
+        import tracemalloc
+        start_memory = tracemalloc.get_traced_memory()[0]
+        if _peaks:
+            _peaks[-1] = max(_peaks[-1], tracemalloc.get_traced_memory()[1])
+        tracemalloc.reset_peak()
+        _peaks.append(start_memory)
+    start = time.perf_counter()
+    try:
+        return function(*args, **kwargs)
+    finally:
+        seconds = time.perf_counter() - start
+        values = _metrics.setdefault(stage, {'calls': 0, 'seconds': 0.0, 'max-seconds': 0.0})
+        values['calls'] += 1
+        values['seconds'] += seconds
+        values['max-seconds'] = max(values['max-seconds'], seconds)
+        # The tracing may have been stopped inside the stage
+        if allocations and tracemalloc.is_tracing():
+            peak = max(_peaks.pop(), tracemalloc.get_traced_memory()[1])
+            if _peaks:
+                _peaks[-1] = max(_peaks[-1], peak)
+            values['allocated-bytes'] = values.get('allocated-bytes', 0) + peak - start_memory
+            values['peak-bytes'] = max(values.get('peak-bytes', 0), peak - start_memory)
+        elif allocations:
+            _peaks.pop()
+
+
+def _stop_tracing():
+    global _started_tracing
+    if _started_tracing:
+        import tracemalloc
+        tracemalloc.stop()
+        _started_tracing = False
+
+
+def _escape_label(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _write_atomically(path: str, content: str):
+    # Imported here, it's only needed to export and it is slow to import
+    import tempfile
+    handle, temporary = tempfile.mkstemp(prefix='.ds301-', dir=os.path.dirname(os.path.abspath(path)))
+    with os.fdopen(handle, 'w') as output:
+        output.write(content)
+    os.replace(temporary, path)
+
+
+def _export_at_exit(path: str, worker: bool = False):
+    _merge_workers(path, os.getpid())
+    if worker:
+        # Left in a hidden directory of the parent, which is ignored by the textfile collector
+        import multiprocessing
+        directory = _workers_directory(path, multiprocessing.parent_process().pid)
+        os.makedirs(directory, exist_ok=True)
+        to_json(os.path.join(directory, f'{os.getpid()}.json'))
+    elif path.endswith('.json'):
+        to_json(path)
+    else:
+        write_prometheus(path)
+
+
+def _workers_directory(path: str, pid: int) -> str:
+    return os.path.join(os.path.dirname(os.path.abspath(path)), f'.{os.path.basename(path)}.{pid}.workers')
+
+
+def _merge_workers(path: str, pid: int):
+    """Adds the metrics left by the workers of this process to its own, and removes their files"""
+    directory = _workers_directory(path, pid)
+    if not os.path.isdir(directory):
+        return
+    for name in os.listdir(directory):
+        worker_file = os.path.join(directory, name)
+        if name.endswith('.json'):
+            with open(worker_file) as metrics_file:
+                stages = json.load(metrics_file)['stages']
+            for stage, worker_values in stages.items():
+                values = _metrics.setdefault(stage, {'calls': 0, 'seconds': 0.0, 'max-seconds': 0.0})
+                for key, value in worker_values.items():
+                    # The maximums are gauges, everything else is a counter
+                    merge = max if key in ('max-seconds', 'peak-bytes') else sum
+                    values[key] = merge((values.get(key, 0), value))
+        # Including the temporary files of the workers that didn't finish writing
+        os.remove(worker_file)
+    try:
+        os.rmdir(directory)
+    except OSError:
+        pass
+
+
+def _register_export(path: str):
+    """Writes the metrics at exit. Worker processes of `multiprocessing` leave through `os._exit`, without running the
+    `atexit` handlers, but they do run the finalizers of `multiprocessing.util`
+    """
+    import multiprocessing
+    from multiprocessing import util
+    if multiprocessing.parent_process() is None:
+        atexit.register(_export_at_exit, path)
+        # Forked workers don't import the module again. The finalizers of the parent are cleared in the child, so the
+        # export of the worker is registered after the fork
+        util.register_after_fork(_export_at_exit, functools.partial(_after_fork, path))
+    else:
+        util.Finalize(None, _export_at_exit, args=(path, True), exitpriority=0)
+
+
+def _after_fork(path: str, _):
+    # A forked worker starts with a copy of the metrics of its parent, which are exported by the parent itself
+    from multiprocessing import util
+    reset()
+    util.Finalize(None, _export_at_exit, args=(path, True), exitpriority=0)
+
+
+if os.environ.get(ENV_VARIABLE, '').lower() not in ('', '0', 'false'):
+    enable(allocations=os.environ[ENV_VARIABLE].lower() == 'memory')
+    if os.environ.get(OUTPUT_ENV_VARIABLE):
+        _register_export(os.environ[OUTPUT_ENV_VARIABLE])
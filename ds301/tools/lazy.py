@@ -0,0 +1,24 @@
+import importlib
+
+
+class LazyModule:
+    """Stand-in for a module that is only imported the first time one of its attributes is used. It keeps heavy
+    dependencies (pandas, SciPy) out of the import time of the package, for the code paths that don't need them.
+
+    After the import, the namespace of the module is copied into the stand-in, so later attribute lookups are as fast as
+    on the module itself.
+
+    Args:
+        name: Absolute name of the module, i.e. 'scipy.special'
+    """
+
+    def __init__(self, name: str):
+        self._lazy_name = name
+
+    def __getattr__(self, attribute: str):
+        module = importlib.import_module(self._lazy_name)
+        self.__dict__.update(vars(module))
+        return getattr(module, attribute)
+
+    def __repr__(self):
+        return f'LazyModule({self._lazy_name!r})'
@@ -1,9 +1,11 @@
-import pandas as pd
-from statistics.inference import samples
-from statistics.inference import hypothesis
+from ds301.datasets import load_dataset
+from ds301.inference import samples
+from ds301.inference import hypothesis
+from ds301.inference import grouped
+from ds301.inference import permutation
 
-immune_tea_data = pd.read_csv('statistics/data/ImmuneTea.csv')
-wetsuit_data = pd.read_csv('statistics/data/Wetsuits.csv')
+immune_tea_data = load_dataset('ImmuneTea')
+wetsuit_data = load_dataset('Wetsuits')
 
 # Q7.a Data: Wetsuits (difference of two means), Test: is there a difference in swimming speeds due to wearing a wetsuit
 test_result = hypothesis.two_mean_test(wetsuit_data.describe(), ('Wetsuit', 'NoWetsuit'),
@@ -15,25 +17,15 @@ wetsuit_data_difference = wetsuit_data['NoWetsuit'] - wetsuit_data['Wetsuit']
 test_result = hypothesis.single_mean_test(wetsuit_data_difference, mu_0=0, alternative='two-sided')
 print(f'Q7: The p-value as matched pairs is {test_result["p-value"]}')
 
-# Q7.b
-# Q7.c Data Manipulation for the StatKey Simulation
-wetsuit_statkey = pd.DataFrame(
-                                data={
-                                    'Time': wetsuit_data['Wetsuit'],
-                                    'Wetsuit': 'yes'
-                                })
-wetsuit_statkey = wetsuit_statkey.append(pd.DataFrame(
-                                                        data={
-                                                            'Time': wetsuit_data['NoWetsuit'],
-                                                            'Wetsuit': 'no'
-                                                        }
-                                                      ), ignore_index=True)
-# File for Two Means Simulation
-wetsuit_statkey.to_csv('/tmp/wetsuit_statkey_two-means.csv', index=False)
-
-# File for matched pairs Simulation
+# Q7.b Randomization test for the difference of means
+test_result = permutation.two_means_permutation_test(wetsuit_data['Wetsuit'], wetsuit_data['NoWetsuit'],
+                                                     alternative='two-sided', seed=301)
+print(f'Q7.b: The p-value of the randomization test for the difference of means is {test_result["p-value"]}')
+
+# Q7.c Randomization test as matched pairs
 wetsuit_data['Difference'] = wetsuit_data['Wetsuit'] - wetsuit_data['NoWetsuit']
-wetsuit_data.to_csv('/tmp/wetsuit_statkey_matched-pairs.csv', index=False)
+test_result = permutation.matched_pairs_permutation_test(wetsuit_data['Difference'], alternative='two-sided', seed=301)
+print(f'Q7.c: The p-value of the randomization test as matched pairs is {test_result["p-value"]}')
 
 # Q11. The manufacturers are interested in estimating the percentage of defective light bulbs coming from a certain
 # process. They want a 90% confidence interval with a margin of error of 2%.  How many light bulbs must they test?
@@ -55,8 +47,9 @@ print(f'Q13: The size of the sample needed is {sample_size}')
 print('Q14: NOOP')
 
 # Q15. Data: Immune Tea, Test: Production of interferon gamma is enhanced in tea drinkers?
-interferon_gamma = immune_tea_data.groupby('Drink').describe().get('InterferonGamma').transpose()
-test_result = hypothesis.two_mean_test(interferon_gamma, ('Tea', 'Coffee'), alternative='greater')
-print(f'Q15: The p-value is {test_result["p-value"]}')
-test_result = hypothesis.two_mean_test(interferon_gamma, ('Tea', 'Coffee'), alternative='greater', df='satterthwait')
-print(f'Q15: The p-value, using the Satterthwait approximation is {test_result["p-value"]}')
+test_result = grouped.pairwise_means_test(immune_tea_data, group='Drink', value='InterferonGamma',
+                                          alternative='greater', control='Coffee')
+print(f'Q15: The p-value is {test_result["p-value"][0]}')
+test_result = grouped.pairwise_means_test(immune_tea_data, group='Drink', value='InterferonGamma',
+                                          alternative='greater', control='Coffee', df='satterthwait')
+print(f'Q15: The p-value, using the Satterthwait approximation is {test_result["p-value"][0]}')
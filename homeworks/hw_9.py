@@ -1,10 +1,10 @@
-import pandas as pd
-from statistics.inference import hypothesis
-from statistics.inference import confidence
+from ds301.datasets import load_dataset
+from ds301.inference import hypothesis
+from ds301.inference import confidence
 
-salary_data = pd.read_csv('statistics/data/SalaryGender.csv')
-student_data = pd.read_csv('statistics/data/StudentSurvey.csv')
-cocaine_data = pd.read_csv('statistics/data/CocaineTreatment.csv')
+salary_data = load_dataset('SalaryGender')
+student_data = load_dataset('StudentSurvey')
+cocaine_data = load_dataset('CocaineTreatment')
 
 # Q1. Data: Salary Gender, Test: Avg of college teachers is less than 50 years
 test_result = hypothesis.single_mean_test(salary_data['Age'], mu_0=50, alternative='less')
@@ -12,7 +12,7 @@ print(f'Q1: The p-value is {test_result["p-value"]}')
 
 # Q2. Data: Student Survey, CI: 90% for mean of Math SAT score
 confidence_interval = confidence.single_mean_interval(student_data['MathSAT'], ci=0.90)
-print(f'Q2: The length of the confidence interval is {confidence_interval[0]-confidence_interval[1]}')
+print(f'Q2: The length of the confidence interval is {confidence_interval[1]-confidence_interval[0]}')
 
 # Q3: NOOP
 print('Q3: NOOP')
@@ -36,4 +36,4 @@ print(f'Q5: The p-value is {test_result["p-value"]}')
 # Q6. Data: Cocaine Treatment, CI: 83% for the difference of proportion in the population who are expected to have no
 # relapse, between those treated with Desipramine and those treated with Lithium
 confidence_interval = confidence.two_proportions_interval(p_non_relapse, categories=('Desipramine', 'Lithium'), ci=0.83)
-print(f'Q6: The length of the confidence interval is {confidence_interval[0]-confidence_interval[1]}')
\ No newline at end of file
+print(f'Q6: The length of the confidence interval is {confidence_interval[1]-confidence_interval[0]}')
\ No newline at end of file
@@ -1,5 +1,16 @@
+import time
 import numpy as np
 import pandas as pd
+from typing import TYPE_CHECKING, Callable, Dict, NamedTuple, Sequence, Tuple
+from ds301.inference import kernels
+from ds301.tools.instrumentation import instrument
+if TYPE_CHECKING:
+    from simulations.genetic_disorder.storage import CohortStore
+
+# Upper bound on the number of uniforms held in memory at once by the batched engines (32 MB of float64)
+MAX_BLOCK_ELEMENTS: int = 2 ** 22
+
+ENGINES = ('subjects', 'binomial')
 
 
 class GeneticDisorderTestingExperiment:
@@ -13,16 +24,31 @@ class GeneticDisorderTestingExperiment:
         :param int n: Sample size | Number of hypothetical subjects
         :param float sens: Probability of the test returning a positive result if the subject has the disorder
         :param float spec: Probability of the test returning a negative result if the subject doesn't have the disorder
+        :param str engine: 'subjects' (default) draws every subject individually. 'binomial' draws the confusion counts
+            directly from their binomial distributions, so the cost of a replicate doesn't depend on `n`; in this mode
+            the individual-level `_sample` and `_test_results` are not generated.
+        :param numpy.random.Generator rng: Source of random numbers. By default, the global `numpy.random` state is
+            used. Pass a dedicated Generator to get reproducible and independent streams, e.g. when running in parallel.
+        :param CohortStore store: Optional store where `run_simulation` persists the cohort of each run (per-subject
+            engine only), bit-packed, for post-hoc analysis.
     """
     _sample: pd.Series = None
     _test_results: pd.Series = None
+    MAX_BLOCK_ELEMENTS: int = MAX_BLOCK_ELEMENTS
 
-    def __init__(self, p: float = 0.02, n: int = 10000, sens: float = 0.999, spec: float = 0.995):
+    ENGINES = ENGINES
+
+    def __init__(self, p: float = 0.02, n: int = 10000, sens: float = 0.999, spec: float = 0.995,
+                 engine: str = 'subjects', rng: np.random.Generator = None, store: 'CohortStore' = None):
         self.p = p
         self.n = n
         self.sens = sens
         self.spec = spec
+        self.engine = _check_engine(engine)
+        self._rng = _default_rng(rng)
+        self.store = store
 
+    @instrument
     def _generate_sample(self, p: float = None, n: int = None) -> pd.Series:
         """ Generate a sample of test subjects indicating if they have a genetic disorder, based on parameters.
 
@@ -32,43 +58,328 @@ class GeneticDisorderTestingExperiment:
         """
         self.p = p if p is not None else self.p
         self.n = n if n is not None else self.n
-        return pd.Series(np.random.choice((True, False),
-                                          size=self.n,
-                                          p=(self.p, 1 - self.p),
-                                          replace=True),
+        return pd.Series(self._rng.choice((True, False),
+                                         size=self.n,
+                                         p=(self.p, 1 - self.p),
+                                         replace=True),
                          name='genetic_disorder')
 
     def resample(self, p: float = None, n: int = None) -> None:
         self._sample = self._generate_sample(p, n)
 
+    @instrument
     def run_simulation(self) -> float:
         """ The simulation will generate a sample of individuals, then will simulate the testing results, and finally
         will compute the probability of the subjects having the disorder based on the test results.
 
         :return float: Empirical calculation of P(B|A)
         """
+        if self.engine == 'binomial':
+            tp, fp, _, _ = self._count_binomial(1)
+            return tp[0] / (tp[0] + fp[0])
         self._sample = self._generate_sample()
         self._test_results = self.apply_test()
+        if self.store is not None:
+            self.store.append(self._sample.to_numpy(), self._test_results.to_numpy())
         n_ab = (self._sample & self._test_results).sum()
         n_b = self._test_results.sum()
         return n_ab / n_b
 
+    @instrument
     def apply_test(self) -> pd.Series:
         """ Simulates a test to the sample of subjects. Use class defined sensitivity and specificity attributes.
 
         :return pandas.Series: Tests results. Values in {0, 1} for negative and positive respectively.
         """
-        _pd_data = {
-            'sample': self._sample,
-            'test_result': pd.Series(np.random.uniform(size=self.n))
-        }
+        _uniform = self._rng.uniform(size=self.n)
+        # Pr(positive_test | has genetic disorder) if the subject has the disorder, otherwise
+        # Pr(positive_test | doesn't have genetic disorder)
+        _positive = np.where(self._sample, _uniform < self.sens, _uniform < (1 - self.spec))
+        return pd.Series(_positive, name='positive_test')
+
+    def run_replicates(self, r: int, block_size: int = None) -> pd.DataFrame:
+        """ Runs `r` independent replicates of the simulation at once. The subjects of each replicate are drawn as a row
+        of a 2-D array, and the rows are processed in blocks so the memory used doesn't grow with `r`.
+
+        :param int r: Number of replicates
+        :param int block_size: Number of replicates drawn per block. By default, as many as fit in `MAX_BLOCK_ELEMENTS`
+        :return pandas.DataFrame: One row per replicate with the confusion counts (tp, fp, tn, fn), ppv and npv
+        """
+        if block_size is None:
+            block_size = max(1, self.MAX_BLOCK_ELEMENTS // max(self.n, 1))
+        if self.engine == 'binomial':
+            return summarize_counts(*self._count_binomial(r))
+        _counts = [self._count_subjects(min(block_size, r - start)) for start in range(0, r, block_size)]
+        return summarize_counts(*(np.concatenate(c) for c in zip(*_counts)))
 
-        _test_df = pd.DataFrame(data=_pd_data)
-        _test_df['positive_test'] = False
+    def run_streaming(self, chunk_size: int = 2 ** 20, callback: Callable[[int, float], None] = None) -> pd.Series:
+        """ Simulates the `n` subjects in chunks of `chunk_size` and only keeps the running confusion counts, so the
+        peak memory is bounded by the chunk size instead of `n`. Always uses the per-subject engine.
 
-        # Pr(positive_test | has genetic disorder)
-        _test_df['positive_test'].mask(_test_df['sample'] == 1, _test_df['test_result'] < self.sens, inplace=True)
-        # Pr(positive_test | doesn't have genetic disorder)
-        _test_df['positive_test'].mask(_test_df['sample'] == 0, _test_df['test_result'] < (1-self.spec), inplace=True)
+        :param int chunk_size: Number of subjects generated and tested at once
+        :param callable callback: Optional function called after each chunk with the number of subjects simulated so
+            far and the running estimate of P(A|B)
+        :return pandas.Series: The confusion counts (tp, fp, tn, fn), ppv and npv of the whole population
+        """
+        _totals = np.zeros(4, dtype=np.int64)
+        for start in range(0, self.n, chunk_size):
+            _size = min(chunk_size, self.n - start)
+            _totals += np.concatenate(self._count_subjects(1, _size))
+            if callback is not None:
+                with np.errstate(divide='ignore', invalid='ignore'):
+                    callback(start + _size, _totals[0] / (_totals[0] + _totals[1]))
+        return summarize_counts(*_totals[:, np.newaxis]).iloc[0]
+
+    def _count_subjects(self, rows: int, n: int = None) -> Tuple[np.ndarray, ...]:
+        """ Draws `rows` replicates of `n` subjects and counts the outcomes of the test in each one of them. The
+        subjects are drawn in column chunks, so no more than `MAX_BLOCK_ELEMENTS` uniforms are held in memory at once.
+
+        A single uniform per subject is enough to draw both events: u < p means the subject has the disorder, and in
+        that case u is uniform in [0, p), so u < p*sens is a positive test with probability sens. Likewise, for a
+        subject without the disorder u is uniform in [p, 1), and u < p + (1-p)*(1-spec) with probability 1-spec.
+
+        :param int rows: Number of replicates to draw
+        :param int n: Number of subjects per replicate. Defaults to `self.n`
+        :return Tuple: Arrays with the true positives, false positives, true negatives and false negatives per row
+        """
+        n = self.n if n is None else n
+        n_a = np.zeros(rows, dtype=np.int64)
+        tp = np.zeros(rows, dtype=np.int64)
+        n_b = np.zeros(rows, dtype=np.int64)
+        _chunk = max(1, self.MAX_BLOCK_ELEMENTS // rows)
+        for start in range(0, n, _chunk):
+            _uniform = self._rng.random(size=(rows, min(_chunk, n - start)))
+            n_a += np.count_nonzero(_uniform < self.p, axis=1)
+            tp += np.count_nonzero(_uniform < self.p * self.sens, axis=1)
+            # Subjects with u < p + (1-p)*(1-spec): the n_a subjects with the disorder plus the false positives
+            n_b += np.count_nonzero(_uniform < self.p + (1 - self.p) * (1 - self.spec), axis=1)
+            # Release the chunk before drawing the next one, otherwise both are alive at the same time
+            del _uniform
+        fp = n_b - n_a
+        return tp, fp, n - n_a - fp, n_a - tp
+
+    def run_adaptive(self, tolerance: float = 0.01, ci: float = 0.95, batch_size: int = 100000,
+                     max_subjects: int = 10 ** 9, max_seconds: float = None) -> Dict:
+        """ Keeps simulating batches of subjects until the half-width of the confidence interval of P(A|B) is below
+        `tolerance`, or until the budget of subjects or time runs out. Instead of guessing `n` up front, the simulation
+        only runs as many subjects as the requested precision needs. The attribute `n` is not used.
+
+        The interval is the Wilson score interval, which, unlike the normal approximation, has a positive width when
+        there are no false positives, so runs with P(A|B) near 1 (i.e. `spec=1.0`) also stop on the tolerance.
+
+        :param float tolerance: Target half-width of the confidence interval
+        :param float ci: Level of confidence for the interval as a real number between 0 and 1
+        :param int batch_size: Number of subjects simulated between two checks of the precision
+        :param int max_subjects: Maximum number of subjects to simulate
+        :param float max_seconds: Maximum wall time in seconds. By default, there is no time limit
+        :return dict: The estimate of P(A|B) ('ppv'), the (start, end) of its 'interval', the number of subjects
+            simulated ('n'), the number of positive tests ('positives') and the 'stop-reason', one of 'tolerance',
+            'max-subjects' or 'max-seconds'
+        """
+        _count = self._count_binomial if self.engine == 'binomial' else self._count_subjects
+        z_star = abs(kernels.norm_ppf((1 - ci) / 2))
+        _start = time.perf_counter()
+        tp, fp, n = 0, 0, 0
+        while True:
+            _size = min(batch_size, max_subjects - n)
+            _tp, _fp, _, _ = _count(1, _size)
+            tp, fp, n = tp + int(_tp[0]), fp + int(_fp[0]), n + _size
+            _lower, _upper = _wilson_interval(tp, tp + fp, z_star) if tp + fp > 0 else (0.0, 1.0)
+            if (_upper - _lower) / 2 <= tolerance:
+                stop_reason = 'tolerance'
+                break
+            if n >= max_subjects:
+                stop_reason = 'max-subjects'
+                break
+            if max_seconds is not None and time.perf_counter() - _start >= max_seconds:
+                stop_reason = 'max-seconds'
+                break
+
+        _positives = tp + fp
+        if _positives == 0:
+            ppv, interval = np.nan, (np.nan, np.nan)
+        else:
+            ppv = tp / _positives
+            interval = _wilson_interval(tp, _positives, z_star)
+        return {'ppv': ppv, 'interval': (float(interval[0]), float(interval[1])), 'n': n, 'positives': _positives,
+                'stop-reason': stop_reason}
+
+    def _count_binomial(self, rows: int, n: int = None) -> Tuple[np.ndarray, ...]:
+        """ Draws the confusion counts of `rows` replicates from their sampling distributions. The number of subjects
+        with the disorder is Binomial(n, p), and given that number, the true positives and false positives are
+        Binomial(n_a, sens) and Binomial(n - n_a, 1 - spec). The result has the same distribution as `_count_subjects`.
+
+        :param int rows: Number of replicates to draw
+        :param int n: Number of subjects per replicate. Defaults to `self.n`
+        :return Tuple: Arrays with the true positives, false positives, true negatives and false negatives per row
+        """
+        n = self.n if n is None else n
+        n_a = self._rng.binomial(n, self.p, size=rows)
+        tp = self._rng.binomial(n_a, self.sens)
+        fp = self._rng.binomial(n - n_a, 1 - self.spec)
+        return tp, fp, n - n_a - fp, n_a - tp
+
+
+def _check_engine(engine: str) -> str:
+    if engine not in ENGINES:
+        raise ValueError(f"engine must be one of {ENGINES}")
+    return engine
+
+
+def _default_rng(rng: np.random.Generator = None):
+    # The numpy.random module exposes the same sampling methods as a Generator
+    return rng if rng is not None else np.random
+
+
+def _wilson_interval(successes: int, n: int, z_star: float) -> Tuple[float, float]:
+    """ Wilson score interval of a proportion, with `z_star` the (positive) critical value of the standard normal """
+    p_hat = successes / n
+    _denominator = 1 + z_star ** 2 / n
+    _center = (p_hat + z_star ** 2 / (2 * n)) / _denominator
+    _ME = z_star / _denominator * np.sqrt(p_hat * (1 - p_hat) / n + z_star ** 2 / (4 * n ** 2))
+    # Clipped, the bounds can be off by a rounding error when p_hat is 0 or 1
+    return max(_center - _ME, 0.0), min(_center + _ME, 1.0)
+
+
+def summarize_counts(tp, fp, tn, fn) -> pd.DataFrame:
+    """ Builds a table with the confusion counts of a set of replicates and the predictive values derived from them.
+
+    :param tp: True positives per replicate, i.e. has the disorder and tested positive
+    :param fp: False positives per replicate
+    :param tn: True negatives per replicate
+    :param fn: False negatives per replicate
+    :return pandas.DataFrame: Columns tp, fp, tn, fn, ppv = P(A|B) and npv = P(not A|not B). The predictive values are
+        NaN when there are no positive (or negative) tests in the replicate.
+    """
+    tp, fp, tn, fn = (np.asarray(c, dtype=np.int64) for c in (tp, fp, tn, fn))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ppv = tp / (tp + fp)
+        npv = tn / (tn + fn)
+    return pd.DataFrame({'tp': tp, 'fp': fp, 'tn': tn, 'fn': fn, 'ppv': ppv, 'npv': npv})
+
+
+class ScreeningStage(NamedTuple):
+    """ A test of a screening program.
+
+    Args:
+        :param float sens: Probability of the test returning a positive result if the subject has the disorder
+        :param float spec: Probability of the test returning a negative result if the subject doesn't have the disorder
+        :param float cost: Cost of testing one subject
+        :param str name: Name of the stage in the results. Defaults to 'stage-<k>'
+    """
+    sens: float
+    spec: float
+    cost: float = 0.0
+    name: str = None
+
+
+class ScreeningPipeline:
+    """ Simulates a multi-stage screening program: every subject takes the first test, and only the subjects that tested
+    positive in a stage move on to the next one. The positives of the last stage are the positives of the program, and
+    a subject screened out at any stage is a negative. The test results of the stages are independent given the
+    disorder status of the subject.
+
+    Downstream stages only work on the survivors of the previous stage, so their cost is proportional to the number of
+    positives rather than to `n`.
+
+    Args:
+        :param Sequence[ScreeningStage] stages: Tests of the program, in the order they are applied
+        :param float p: Probability of an individual within the population of having the genetic disorder
+        :param int n: Number of subjects screened
+        :param str engine: 'subjects' (default) draws every subject individually and keeps the disorder status of the
+            survivors of each stage. 'binomial' chains the counts of the stages, i.e. the true positives of a stage are
+            Binomial(tp of the previous stage, sens), so the cost doesn't depend on `n`.
+        :param numpy.random.Generator rng: Source of random numbers. By default, the global `numpy.random` state is
+            used.
+
+    Example:
+        >>> pipeline = ScreeningPipeline([ScreeningStage(0.99, 0.95, cost=1, name='screening'),
+        ...                               ScreeningStage(0.999, 0.999, cost=50, name='confirmatory')])
+        >>> pipeline.run(replicates=1000).groupby('stage')[['ppv', 'npv', 'tested', 'cost']].mean()
+    """
+    MAX_BLOCK_ELEMENTS: int = MAX_BLOCK_ELEMENTS
+
+    ENGINES = ENGINES
+
+    def __init__(self, stages: Sequence[ScreeningStage], p: float = 0.02, n: int = 10000, engine: str = 'subjects',
+                 rng: np.random.Generator = None):
+        if len(stages) == 0:
+            raise ValueError("The pipeline needs at least one stage")
+        self.stages = [ScreeningStage(*stage) for stage in stages]
+        self.p = p
+        self.n = n
+        self.engine = _check_engine(engine)
+        self._rng = _default_rng(rng)
+
+    def run(self, replicates: int = 1) -> pd.DataFrame:
+        """ Runs `replicates` independent replicates of the screening program.
 
-        return _test_df['positive_test']
+        The counts of a stage are relative to the subjects tested in it: tp and fp are the subjects that move on to the
+        next stage, and tn and fn the subjects screened out by the stage. Hence, the ppv of a stage is the ppv of the
+        program truncated after that stage. The 'overall' rows have the outcome of the whole program, where the
+        negatives are the subjects screened out at any stage.
+
+        :param int replicates: Number of replicates
+        :return pandas.DataFrame: One row per replicate and stage plus an 'overall' row per replicate, with the columns
+            replicate, stage, tested, tp, fp, tn, fn, ppv, npv and cost
+        """
+        _count = self._count_binomial if self.engine == 'binomial' else self._count_subjects
+        # tested, diseased among the tested, tp and fp, per stage and replicate
+        tested, diseased, tp, fp = _count(replicates)
+        tn, fn = tested - diseased - fp, diseased - tp
+        cost = tested * np.array([stage.cost for stage in self.stages], dtype=float)[:, np.newaxis]
+
+        names = [stage.name or f'stage-{k + 1}' for k, stage in enumerate(self.stages)] + ['overall']
+        tables = []
+        for k, name in enumerate(names):
+            if name == 'overall':
+                table = summarize_counts(tp[-1], fp[-1], tn.sum(axis=0), fn.sum(axis=0))
+                table.insert(0, 'tested', tested[0])
+                table['cost'] = cost.sum(axis=0)
+            else:
+                table = summarize_counts(tp[k], fp[k], tn[k], fn[k])
+                table.insert(0, 'tested', tested[k])
+                table['cost'] = cost[k]
+            table.insert(0, 'stage', name)
+            table.insert(0, 'replicate', np.arange(replicates))
+            tables.append(table)
+        return pd.concat(tables, ignore_index=True).sort_values('replicate', kind='stable', ignore_index=True)
+
+    def _count_subjects(self, replicates: int) -> Tuple[np.ndarray, ...]:
+        """ Draws the subjects in chunks of at most `MAX_BLOCK_ELEMENTS`, and runs every stage on the chunk. Each stage
+        only keeps the disorder status of the subjects that tested positive, which are the only ones tested next.
+
+        :param int replicates: Number of replicates
+        :return Tuple: Arrays of shape (stages, replicates) with the number of subjects tested, the number of them with
+            the disorder, the true positives and the false positives
+        """
+        counts = np.zeros((4, len(self.stages), replicates), dtype=np.int64)
+        for replicate in range(replicates):
+            for start in range(0, self.n, self.MAX_BLOCK_ELEMENTS):
+                _disorder = self._rng.random(min(self.MAX_BLOCK_ELEMENTS, self.n - start)) < self.p
+                for k, stage in enumerate(self.stages):
+                    _uniform = self._rng.random(_disorder.shape[0])
+                    _positive = np.where(_disorder, _uniform < stage.sens, _uniform < (1 - stage.spec))
+                    _tp = np.count_nonzero(_disorder & _positive)
+                    counts[:, k, replicate] += (_disorder.shape[0], np.count_nonzero(_disorder), _tp,
+                                                np.count_nonzero(_positive) - _tp)
+                    _disorder = _disorder[_positive]
+        return tuple(counts)
+
+    def _count_binomial(self, replicates: int) -> Tuple[np.ndarray, ...]:
+        """ Chains the binomial counts of the stages. The subjects tested in a stage are the positives of the previous
+        one, split in the true positives (with the disorder) and the false positives (without it).
+
+        :param int replicates: Number of replicates
+        :return Tuple: Arrays of shape (stages, replicates) with the number of subjects tested, the number of them with
+            the disorder, the true positives and the false positives
+        """
+        counts = np.zeros((4, len(self.stages), replicates), dtype=np.int64)
+        _diseased = self._rng.binomial(self.n, self.p, size=replicates)
+        _healthy = self.n - _diseased
+        for k, stage in enumerate(self.stages):
+            _tp = self._rng.binomial(_diseased, stage.sens)
+            _fp = self._rng.binomial(_healthy, 1 - stage.spec)
+            counts[:, k] = _diseased + _healthy, _diseased, _tp, _fp
+            _diseased, _healthy = _tp, _fp
+        return tuple(counts)
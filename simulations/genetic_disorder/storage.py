@@ -0,0 +1,127 @@
+import json
+import os
+from typing import Tuple
+
+import numpy as np
+import pandas as pd
+
+from simulations.genetic_disorder.experiments import summarize_counts
+
+# Number of set bits of every byte value, for numpy versions without np.bitwise_count
+_POPCOUNT_TABLE = np.array([bin(value).count('1') for value in range(256)], dtype=np.uint8)
+
+
+class CohortStore:
+    """ Persists the simulated cohorts of `GeneticDisorderTestingExperiment`, so they can be analyzed after the
+    simulation. For every replicate the disorder and test result vectors are bit-packed (8 subjects per byte) and
+    appended to a single data file, and a small JSON index keeps the offset and size of each replicate.
+
+    The data file is memory-mapped: replicates are only read from disk when they are used, and the confusion counts
+    (and from them PPV, NPV and prevalence) are computed with popcounts over the packed bytes, without unpacking.
+
+    Args:
+        :param str path: Directory of the store. It is created if it doesn't exist, and reopened if it does
+    """
+    DATA_FILE = 'cohorts.bin'
+    INDEX_FILE = 'index.json'
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        self._index = []
+        if os.path.exists(self._file(self.INDEX_FILE)):
+            with open(self._file(self.INDEX_FILE)) as index_file:
+                self._index = json.load(index_file)
+        self._data = None
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def append(self, disorder: np.ndarray, positive: np.ndarray) -> int:
+        """ Stores a replicate.
+
+        :param numpy.ndarray disorder: Boolean vector, True for the subjects that have the disorder
+        :param numpy.ndarray positive: Boolean vector, True for the subjects that tested positive
+        :return int: Number of the replicate in the store
+        """
+        disorder = np.asarray(disorder, dtype=bool)
+        positive = np.asarray(positive, dtype=bool)
+        if disorder.shape != positive.shape or disorder.ndim != 1:
+            raise ValueError("disorder and positive must be 1-D vectors of the same size")
+        packed_disorder = np.packbits(disorder)
+        packed_positive = np.packbits(positive)
+        with open(self._file(self.DATA_FILE), 'ab') as data_file:
+            offset = data_file.tell()
+            data_file.write(packed_disorder.tobytes())
+            data_file.write(packed_positive.tobytes())
+        self._index.append({'offset': offset, 'n': int(disorder.shape[0]), 'nbytes': int(packed_disorder.shape[0])})
+        self._write_index()
+        # The memory map doesn't cover the new bytes, it is mapped again on the next read
+        self._data = None
+        return len(self._index) - 1
+
+    def packed(self, replicate: int) -> Tuple[np.ndarray, np.ndarray]:
+        """ Packed disorder and test result vectors of a replicate, as views of the memory-mapped file.
+
+        :param int replicate: Number of the replicate
+        :return Tuple: Two uint8 arrays with 8 subjects per byte
+        """
+        entry = self._index[replicate]
+        data = self._memory_map()
+        start = entry['offset']
+        middle = start + entry['nbytes']
+        return data[start:middle], data[middle:middle + entry['nbytes']]
+
+    def load(self, replicate: int) -> Tuple[np.ndarray, np.ndarray]:
+        """ Unpacked disorder and test result vectors of a replicate.
+
+        :param int replicate: Number of the replicate
+        :return Tuple: Two boolean vectors with one element per subject
+        """
+        n = self._index[replicate]['n']
+        return tuple(np.unpackbits(vector, count=n).astype(bool) for vector in self.packed(replicate))
+
+    def counts(self, replicate: int) -> Tuple[int, int, int, int]:
+        """ Confusion counts of a replicate, computed over the packed vectors. The padding bits of the last byte are
+        zero, so they don't add to any count.
+
+        :param int replicate: Number of the replicate
+        :return Tuple: True positives, false positives, true negatives and false negatives
+        """
+        disorder, positive = self.packed(replicate)
+        n_a = _popcount(disorder)
+        n_b = _popcount(positive)
+        tp = _popcount(disorder & positive)
+        fp = n_b - tp
+        return tp, fp, self._index[replicate]['n'] - n_a - fp, n_a - tp
+
+    def summary(self) -> pd.DataFrame:
+        """ Confusion counts, ppv, npv and prevalence of every replicate in the store.
+
+        :return pandas.DataFrame: One row per replicate
+        """
+        counts = np.array([self.counts(replicate) for replicate in range(len(self))], dtype=np.int64).reshape(-1, 4)
+        summary = summarize_counts(*counts.T)
+        summary['prevalence'] = (summary['tp'] + summary['fn']) / counts.sum(axis=1)
+        return summary
+
+    def _memory_map(self) -> np.memmap:
+        if self._data is None:
+            self._data = np.memmap(self._file(self.DATA_FILE), dtype=np.uint8, mode='r')
+        return self._data
+
+    def _write_index(self):
+        # Write to a temporary file and rename it, so a crash never leaves a truncated index behind
+        temporary = self._file(self.INDEX_FILE + '.tmp')
+        with open(temporary, 'w') as index_file:
+            json.dump(self._index, index_file)
+        os.replace(temporary, self._file(self.INDEX_FILE))
+
+    def _file(self, name: str) -> str:
+        return os.path.join(self.path, name)
+
+
+def _popcount(packed: np.ndarray) -> int:
+    if hasattr(np, 'bitwise_count'):
+        return int(np.bitwise_count(packed).sum(dtype=np.int64))
+    return int(_POPCOUNT_TABLE[packed].sum(dtype=np.int64))
@@ -0,0 +1,56 @@
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Sequence
+
+import numpy as np
+import pandas as pd
+
+from simulations.genetic_disorder.experiments import GeneticDisorderTestingExperiment
+
+PARAMETERS = ('p', 'n', 'sens', 'spec')
+
+
+def run_sweep(grid: Dict[str, Sequence], replicates: int = 1, seed: int = None, workers: int = None,
+              engine: str = 'binomial') -> pd.DataFrame:
+    """ Runs `GeneticDisorderTestingExperiment` for every combination of the parameters in `grid`, distributing the grid
+    cells across a pool of processes.
+
+    Each cell gets its own `numpy.random.Generator`, spawned from a root `SeedSequence` in the order of the cells. The
+    streams don't depend on which process runs a cell, so for a given `seed` the results are identical regardless of
+    the number of workers.
+
+    :param dict grid: Values to sweep for each parameter, i.e. {'p': [0.01, 0.02], 'spec': [0.99, 0.995]}. Valid keys
+        are 'p', 'n', 'sens' and 'spec'; the parameters that are not in the grid keep the experiment defaults.
+    :param int replicates: Number of replicates to run in each cell
+    :param int seed: Root seed. When None, fresh entropy is taken from the OS
+    :param int workers: Number of processes. By default, the number of CPUs; 1 runs everything in this process
+    :param str engine: Engine used by the experiments, 'binomial' (default) or 'subjects'
+    :return pandas.DataFrame: One row per cell and replicate with the parameters, the replicate number, the confusion
+        counts, ppv and npv
+    """
+    unknown = set(grid) - set(PARAMETERS)
+    if unknown:
+        raise ValueError(f"Unknown parameters in grid: {sorted(unknown)}. Valid parameters are {PARAMETERS}")
+    names = [name for name in PARAMETERS if name in grid]
+    cells = [dict(zip(names, values)) for values in itertools.product(*(grid[name] for name in names))]
+    seeds = np.random.SeedSequence(seed).spawn(len(cells))
+    tasks = [(cell, replicates, engine, cell_seed) for cell, cell_seed in zip(cells, seeds)]
+
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(tasks) == 1:
+        results = list(map(_run_cell, tasks))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(_run_cell, tasks, chunksize=max(1, len(tasks) // (4 * workers))))
+    return pd.concat(results, ignore_index=True)
+
+
+def _run_cell(task: tuple) -> pd.DataFrame:
+    cell, replicates, engine, cell_seed = task
+    experiment = GeneticDisorderTestingExperiment(**cell, engine=engine, rng=np.random.default_rng(cell_seed))
+    result = experiment.run_replicates(replicates)
+    for position, name in enumerate(PARAMETERS):
+        result.insert(position, name, getattr(experiment, name))
+    result.insert(len(PARAMETERS), 'replicate', np.arange(replicates))
+    return result